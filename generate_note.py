@@ -12,26 +12,34 @@ Usage:
     python generate_note.py --dry-run                # Preview only
     python generate_note.py --send                   # Force send notification
     python generate_note.py --weekly                 # Generate weekly report
+    python generate_note.py --monthly                # Generate monthly report
     python generate_note.py --date 2026-02-07        # Override date (testing)
+    python generate_note.py --full-verify            # Re-hash all files (mtime mode)
+    python generate_note.py --jobs 4                 # Process projects concurrently
+    python generate_note.py --async                  # Overlap AI calls / notifications (asyncio)
+    python generate_note.py --batch                  # Pack several entries into one AI request
 """
 
 import argparse
+import codecs
+import contextvars
 import datetime
-import email.mime.multipart
-import email.mime.text
-import fnmatch
+import functools
 import hashlib
 import json
 import os
-import smtplib
+import re
 import subprocess
 import sys
-import urllib.request
-import urllib.error
+import threading
+import time
 from pathlib import Path
 from typing import Optional
 
-import yaml
+# Imported where used so that a run with nothing to do stays fast to start:
+# asyncio (--async), concurrent.futures (worker pools), smtplib / email.mime /
+# http.client (notifications), ssl (--async HTTP), sqlite3 (state, search),
+# urllib (Ollama probes) and yaml (load_config).
 
 # ============================================================================
 # Configuration
@@ -45,6 +53,7 @@ def load_config(config_path: str = None) -> dict:
     if not path.exists():
         print(f"[ERROR] Config not found: {path}")
         sys.exit(1)
+    import yaml
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
@@ -53,30 +62,742 @@ def get_date(config: dict) -> datetime.date:
     return config.get("_date_override", datetime.date.today())
 
 
+class ProjectLog:
+    """Line-buffered stdout wrapper that prefixes every line printed for a
+    project with `[project]`, so `--jobs N` / `--async` output stays readable.
+
+    The prefix lives in a context variable, so it follows both worker threads
+    and asyncio tasks (and threads started through run_in_thread)."""
+
+    _prefix = contextvars.ContextVar("project_log_prefix", default=None)
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._bufs = {}  # (thread, prefix) -> partial line
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def write(self, text: str) -> int:
+        prefix = self._prefix.get()
+        if not prefix:
+            with self._lock:
+                return self.stream.write(text)
+        key = (threading.get_ident(), prefix)
+        with self._lock:
+            *lines, rest = (self._bufs.pop(key, "") + text).split("\n")
+            if rest:
+                self._bufs[key] = rest
+            if lines:
+                self.stream.write("".join(f"[{prefix}] {line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        prefix = self._prefix.get()
+        with self._lock:
+            rest = self._bufs.pop((threading.get_ident(), prefix), "")
+            if rest:
+                self.stream.write(f"[{prefix}] {rest}\n")
+        self.stream.flush()
+
+    @classmethod
+    def set_project(cls, name: Optional[str]):
+        if isinstance(sys.stdout, cls):
+            sys.stdout.flush()
+        cls._prefix.set(name)
+
+
+async def run_in_thread(func, *args):
+    """asyncio.to_thread for Python 3.8: run func in the default executor,
+    carrying over context variables (e.g. the ProjectLog prefix)."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(ctx.run, func, *args))
+
+
+# ============================================================================
+# State Store
+# ============================================================================
+
+class StateStore:
+    """Per-project persistent state, shared by all projects in config.yaml.
+
+    Two shapes of data:
+      rows  - large keyed tables (file hashes, line counts) updated incrementally
+      docs  - small JSON documents (scan metadata, idle state, totals)
+
+    Backends: SQLite (default, one WAL-mode database for every project) and
+    JSON files (one file per table/doc, for compatibility and inspection).
+    Legacy `{project}_state.json` / `_linecache.json` / `_idle.json` files are
+    migrated into the active backend the first time a project is accessed.
+    Docs not tied to a project (AI backend health, Slack DM channels) live
+    under the project key SHARED.
+    """
+    SHARED = ""
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._migrated = set()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def open(state_dir: Path, backend: str = "sqlite") -> "StateStore":
+        if backend == "sqlite":
+            try:
+                import sqlite3  # noqa: F401
+                return SQLiteStateStore(state_dir)
+            except ImportError:
+                print("[WARN] sqlite3 모듈을 사용할 수 없어 JSON state backend로 대체합니다")
+        elif backend != "json":
+            print(f"[WARN] Unknown state backend '{backend}', using json")
+        return JSONStateStore(state_dir)
+
+    # --- backend interface ---------------------------------------------------
+    def _load_rows(self, project: str, table: str) -> dict:
+        raise NotImplementedError
+
+    def _apply_rows(self, project: str, table: str, upserts: dict, deletes: list):
+        raise NotImplementedError
+
+    def _load_doc(self, project: str, name: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def _save_doc(self, project: str, name: str, doc: dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    # --- public API ----------------------------------------------------------
+    def load_rows(self, project: str, table: str) -> dict:
+        self._ensure_migrated(project)
+        with self._lock:
+            return self._load_rows(project, table)
+
+    def apply_rows(self, project: str, table: str, upserts: dict, deletes: list = ()):
+        """Upsert changed rows and delete removed keys; untouched rows are not rewritten."""
+        self._ensure_migrated(project)
+        if not upserts and not deletes:
+            return
+        with self._lock:
+            self._apply_rows(project, table, upserts, list(deletes))
+
+    def load_doc(self, project: str, name: str) -> Optional[dict]:
+        self._ensure_migrated(project)
+        with self._lock:
+            return self._load_doc(project, name)
+
+    def save_doc(self, project: str, name: str, doc: dict):
+        self._ensure_migrated(project)
+        with self._lock:
+            self._save_doc(project, name, doc)
+
+    # --- legacy JSON migration -------------------------------------------------
+    def _legacy_files(self, project: str) -> dict:
+        if project == self.SHARED:
+            return {kind: self.state_dir / f"{kind}.json" for kind in ("ai_health", "slack_channels")}
+        return {kind: self.state_dir / f"{project}_{kind}.json"
+                for kind in ("state", "linecache", "idle")}
+
+    def _ensure_migrated(self, project: str):
+        if project in self._migrated:
+            return
+        with self._lock:
+            if project in self._migrated:
+                return
+            self._migrated.add(project)
+            for kind, path in self._legacy_files(project).items():
+                if path.exists():
+                    self._migrate_legacy(project, kind, path)
+
+    def _migrate_legacy(self, project: str, kind: str, path: Path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Skipping unreadable legacy state {path.name}: {e}")
+            return
+        if kind == "state":
+            if "files" not in data:
+                data = {"files": data}  # oldest format: flat {path: entry}
+            saved_at = datetime.date.fromtimestamp(path.stat().st_mtime).isoformat()
+            self._apply_rows(project, "files", data["files"], [])
+            self._save_doc(project, "scan", {
+                "last_full_verify": data.get("last_full_verify"),
+                "hash_algorithm": data.get("hash_algorithm", "md5"),
+                "saved_at": saved_at,
+            })
+        elif kind == "linecache":
+            self._apply_rows(project, "lines", data.get("files", {}), [])
+            self._apply_rows(project, "blobs", data.get("blobs", {}), [])
+            if data.get("stats"):
+                self._save_doc(project, "line_stats", data["stats"])
+        elif kind in ("idle", "ai_health", "slack_channels"):
+            self._save_doc(project, kind, data)
+        path.rename(path.with_name(path.name + ".migrated"))
+        print(f"[INFO] Migrated legacy state {path.name} → {type(self).__name__}")
+
+
+class SQLiteStateStore(StateStore):
+    """All projects in one `state.db` (WAL mode, rows upserted incrementally)."""
+
+    def __init__(self, state_dir: Path):
+        import sqlite3
+        super().__init__(state_dir)
+        self.db_path = self.state_dir / "state.db"
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows (project TEXT, tbl TEXT, key TEXT, value TEXT, "
+            "PRIMARY KEY (project, tbl, key)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs (project TEXT, name TEXT, value TEXT, "
+            "PRIMARY KEY (project, name)) WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def _load_rows(self, project: str, table: str) -> dict:
+        cur = self.conn.execute(
+            "SELECT key, value FROM rows WHERE project = ? AND tbl = ?", (project, table)
+        )
+        return {k: json.loads(v) for k, v in cur}
+
+    def _apply_rows(self, project: str, table: str, upserts: dict, deletes: list):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO rows (project, tbl, key, value) VALUES (?, ?, ?, ?)",
+                ((project, table, k, json.dumps(v, separators=(",", ":"))) for k, v in upserts.items())
+            )
+            self.conn.executemany(
+                "DELETE FROM rows WHERE project = ? AND tbl = ? AND key = ?",
+                ((project, table, k) for k in deletes)
+            )
+
+    def _load_doc(self, project: str, name: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT value FROM docs WHERE project = ? AND name = ?", (project, name)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save_doc(self, project: str, name: str, doc: dict):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO docs (project, name, value) VALUES (?, ?, ?)",
+                (project, name, json.dumps(doc, ensure_ascii=False))
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class JSONStateStore(StateStore):
+    """One JSON file per project table/doc: `{project}_{name}.json`.
+
+    Tables and docs share that namespace, so a table and a doc must never
+    have the same name (NoteIndex: `note_index` rows, `note_index_meta` doc).
+    SHARED docs are `{name}.json`.
+    """
+
+    def _path(self, project: str, name: str) -> Path:
+        if project == self.SHARED:
+            return self.state_dir / f"{name}.json"
+        return self.state_dir / f"{project}_{name}.json"
+
+    def _legacy_files(self, project: str) -> dict:
+        # `{project}_idle.json` and the SHARED `{name}.json` files already are this backend's docs
+        if project == self.SHARED:
+            return {}
+        files = super()._legacy_files(project)
+        files.pop("idle")
+        return files
+
+    def _read(self, path: Path):
+        if path.exists():
+            with open(path, "r") as f:
+                return json.load(f)
+        return None
+
+    def _write(self, path: Path, data):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _load_rows(self, project: str, table: str) -> dict:
+        return self._read(self._path(project, table)) or {}
+
+    def _apply_rows(self, project: str, table: str, upserts: dict, deletes: list):
+        path = self._path(project, table)
+        rows = self._read(path) or {}
+        rows.update(upserts)
+        for k in deletes:
+            rows.pop(k, None)
+        self._write(path, rows)
+
+    def _load_doc(self, project: str, name: str) -> Optional[dict]:
+        return self._read(self._path(project, name))
+
+    def _save_doc(self, project: str, name: str, doc: dict):
+        self._write(self._path(project, name), doc)
+
+
+# ============================================================================
+# Content Cache
+# ============================================================================
+
+class ContentCache:
+    """Directory-of-files cache under `state_dir/cache/<name>/`, keyed by a
+    content fingerprint. Hits refresh the file mtime; once the total size
+    exceeds max_mb the least recently used files are evicted. With ttl_days
+    set, entries older than that are treated as misses and removed."""
+
+    def __init__(self, state_dir: Path, name: str, max_mb: float = 64, ttl_days: float = None):
+        self.dir = Path(state_dir) / "cache" / name
+        self.name = name
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self._lock = threading.Lock()
+        self._total = None  # bytes on disk, scanned lazily on first put
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "bytes_saved": 0}
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / f"{key}.json"
+
+    def _count(self, stat: str, n: int = 1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            value = json.loads(data.decode("utf-8"))
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        if self.ttl and time.time() - value.get("stored_at", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._count("expired")
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)  # LRU: mark as recently used
+        except OSError:
+            pass
+        self._count("hits")
+        self._count("bytes_saved", len(data))
+        return value
+
+    def put(self, key: str, value: dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        value = dict(value, stored_at=time.time())
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        try:
+            replaced = path.stat().st_size  # overwriting a key: its old bytes go away
+        except OSError:
+            replaced = 0
+        os.replace(tmp, path)
+        with self._lock:
+            if self._total is None:
+                self._total = sum(e["size"] for e in self._entries())
+            else:
+                self._total += len(data) - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list:
+        entries = []
+        for sub in (self.dir.iterdir() if self.dir.exists() else []):
+            if not sub.is_dir():
+                continue
+            with os.scandir(sub) as it:
+                for e in it:
+                    if e.name.endswith(".json"):
+                        st = e.stat()
+                        entries.append({"path": e.path, "size": st.st_size, "used": st.st_mtime})
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is under 90% of max."""
+        entries = sorted(self._entries(), key=lambda e: e["used"])
+        total = sum(e["size"] for e in entries)
+        target = int(self.max_bytes * 0.9)
+        for e in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(e["path"])
+                total -= e["size"]
+                self.stats["evicted"] += 1
+            except OSError:
+                pass
+        self._total = total
+
+    def summary(self) -> str:
+        st = self.stats
+        lookups = st["hits"] + st["misses"]
+        rate = f"{100.0 * st['hits'] / lookups:.0f}%" if lookups else "n/a"
+        return (f"[CACHE] {self.name}: {st['hits']} hit / {st['misses']} miss ({rate}), "
+                f"{st['bytes_saved'] / 1024:.1f} KiB saved, "
+                f"{st['expired']} expired, {st['evicted']} evicted")
+
+
+# ============================================================================
+# File Walker
+# ============================================================================
+
+class PathMatcher:
+    """Include/exclude glob sets compiled once into two combined regexes.
+
+    Gitignore-style semantics, shared by the walker and git detection:
+      *  / ?  match within one path segment
+      ** as a whole segment matches zero or more directories
+      a pattern without '/' (e.g. "*.pyc") matches at any depth
+      a trailing '/' means "this directory and everything below"
+      an excluded directory excludes everything below it
+    """
+
+    def __init__(self, include: list, exclude: list):
+        self._include = self._combine(include, subtree=False)
+        self._exclude = self._combine(exclude, subtree=True)
+
+    @classmethod
+    def _combine(cls, patterns: list, subtree: bool):
+        if not patterns:
+            return None
+        # subtree: a match on any ancestor directory also matches the path
+        suffix = "(?:/.*)?" if subtree else ""
+        return re.compile("|".join(f"(?:{cls.translate(p)}){suffix}" for p in patterns), re.DOTALL)
+
+    @classmethod
+    def translate(cls, pattern: str) -> str:
+        p = pattern.replace("\\", "/")
+        anchored = "/" in p.rstrip("/")
+        if p.endswith("/"):
+            p = p.rstrip("/") + "/**"
+        if not anchored:
+            p = "**/" + p
+        segments = p.lstrip("/").split("/")
+        out = []
+        for i, seg in enumerate(segments):
+            last = i == len(segments) - 1
+            if seg == "**":
+                out.append(".*" if last else "(?:[^/]+/)*")
+            else:
+                out.append(cls._translate_segment(seg) + ("" if last else "/"))
+        return "".join(out)
+
+    @staticmethod
+    def _translate_segment(seg: str) -> str:
+        out, i, n = [], 0, len(seg)
+        while i < n:
+            c = seg[i]
+            i += 1
+            if c == "*":
+                while i < n and seg[i] == "*":
+                    i += 1
+                out.append("[^/]*")
+            elif c == "?":
+                out.append("[^/]")
+            elif c == "[":
+                j = i + 1 if i < n and seg[i] in "!^" else i
+                j = seg.find("]", j + 1 if j < n and seg[j] == "]" else j)
+                if j == -1:
+                    out.append(re.escape(c))
+                    continue
+                body = seg[i:j].replace("\\", "\\\\")
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:] + "/"  # never match the separator
+                out.append("[" + body + "]")
+                i = j + 1
+            else:
+                out.append(re.escape(c))
+        return "".join(out)
+
+    def excluded(self, fp: str) -> bool:
+        return bool(self._exclude and self._exclude.fullmatch(fp))
+
+    def match(self, fp: str) -> bool:
+        fp = fp.replace("\\", "/")
+        return bool(self._include and self._include.fullmatch(fp)) and not self.excluded(fp)
+
+    def prune_dir(self, rel_dir: str) -> bool:
+        """True if no file below rel_dir can survive the exclude rules."""
+        # "dir/" matching means the pattern's last segment is all wildcards
+        return self.excluded(rel_dir) or self.excluded(rel_dir + "/")
+
+
+class ProjectWalker:
+    """Single-pass os.scandir walker over a project tree.
+
+    Excluded directories are pruned before descending and all include patterns
+    are evaluated at once, so every file is visited and stat'ed exactly once.
+    Symlinked directories are followed (as pathlib.glob did); each directory is
+    entered once by (st_dev, st_ino), so link cycles terminate.
+    """
+
+    # Auto-exclude: generated files (note + daily files)
+    AUTO_EXCLUDE = ["RESEARCH_NOTE.md", "**/daily/", "**/__pycache__/"]
+
+    def __init__(self, project_config: dict):
+        self.path = Path(project_config["path"]).resolve()
+        self.include = project_config.get("include_patterns", ["**/*"])
+        self.exclude = list(project_config.get("exclude_patterns", []))
+        self.matcher = PathMatcher(self.include, self.AUTO_EXCLUDE + self.exclude)
+
+    def walk(self) -> list:
+        """Return one record per matching file, sorted by relative path:
+        {'path', 'abs', 'ext', 'size', 'mtime', 'ino'}"""
+        records = []
+        match, prune_dir = self.matcher.match, self.matcher.prune_dir
+        stack = [(str(self.path), "")]
+        try:
+            root = os.stat(self.path)
+            seen = {(root.st_dev, root.st_ino)}
+        except OSError:
+            return records
+        while stack:
+            abs_dir, rel_dir = stack.pop()
+            try:
+                it = os.scandir(abs_dir)
+            except (PermissionError, OSError):
+                continue
+            with it:
+                for entry in it:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir():
+                            if not prune_dir(rel):
+                                st = entry.stat()
+                                if (st.st_dev, st.st_ino) not in seen:
+                                    seen.add((st.st_dev, st.st_ino))
+                                    stack.append((entry.path, rel))
+                            continue
+                        if not entry.is_file() or not match(rel):
+                            continue
+                        st = entry.stat()
+                    except (PermissionError, OSError):
+                        continue
+                    records.append({
+                        "path": rel, "abs": entry.path,
+                        "ext": os.path.splitext(entry.name)[1] or "no_ext",
+                        "size": st.st_size, "mtime": st.st_mtime, "ino": st.st_ino,
+                    })
+        records.sort(key=lambda r: r["path"])
+        return records
+
+    def match(self, fp: str) -> bool:
+        return self.matcher.match(fp)
+
+    def should_exclude(self, fp: str) -> bool:
+        return self.matcher.excluded(fp.replace("\\", "/"))
+
+
+class FileHasher:
+    """Streaming file hasher: fixed-size chunks through one reusable buffer.
+
+    Algorithms: md5 | blake2b | xxhash (needs `pip install xxhash`) | sampled.
+    'sampled' fingerprints files above sample_threshold_mb by size + head + tail
+    chunks only; smaller files are hashed in full with blake2b.
+    """
+
+    ALGORITHMS = ("md5", "blake2b", "xxhash", "sampled")
+    SAMPLE_BYTES = 1024 * 1024
+
+    def __init__(self, algorithm: str = "md5", chunk_size: int = 1024 * 1024,
+                 sample_threshold_mb: int = 256):
+        if algorithm not in self.ALGORITHMS:
+            print(f"[WARN] Unknown hash algorithm '{algorithm}', using md5")
+            algorithm = "md5"
+        if algorithm == "xxhash":
+            try:
+                import xxhash  # noqa: F401
+            except ImportError:
+                print("[WARN] xxhash 패키지가 없어 blake2b로 대체합니다: pip install xxhash")
+                algorithm = "blake2b"
+        self.algorithm = algorithm
+        self.sample_threshold = sample_threshold_mb * 1024 * 1024
+        self._buf = bytearray(chunk_size)
+        self._view = memoryview(self._buf)
+
+    def _new(self):
+        if self.algorithm == "md5":
+            return hashlib.md5()
+        if self.algorithm == "xxhash":
+            import xxhash
+            return xxhash.xxh3_128()
+        return hashlib.blake2b(digest_size=16)
+
+    def hash(self, path: str, size: int = None) -> str:
+        h = self._new()
+        with open(path, "rb", buffering=0) as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if self.algorithm == "sampled" and size > max(self.sample_threshold, 2 * self.SAMPLE_BYTES):
+                h.update(str(size).encode())
+                h.update(f.read(self.SAMPLE_BYTES))
+                f.seek(-self.SAMPLE_BYTES, os.SEEK_END)
+                h.update(f.read(self.SAMPLE_BYTES))
+                return h.hexdigest()
+            while True:
+                n = f.readinto(self._buf)
+                if not n:
+                    break
+                h.update(self._view[:n])
+        return h.hexdigest()
+
+
+def run_pool(func, items: list, workers: int = 1) -> list:
+    """Apply func to every item on a thread pool.
+
+    Returns [(item, result, error)] in input order, so the output is identical
+    for any worker count. OSErrors are captured per item instead of raised.
+    """
+    def safe(item):
+        try:
+            return item, func(item), None
+        except OSError as e:
+            return item, None, e
+
+    if workers <= 1 or len(items) < 2:
+        return [safe(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(safe, items))
+
+
+class LineCountCache:
+    """Persistent per-project line counts with incrementally rolled-up totals.
+
+    lines: {path: [key, lines]} where key is a git blob OID or a
+    "size:mtime:inode" stat tuple; blobs: {key: lines} content-addressed pool
+    that survives renames/reverts. Deleted paths are evicted on every update
+    and the pool is compacted to live keys once it outgrows them. Only rows
+    that changed are written back to the state store.
+    """
+
+    def __init__(self, store: "StateStore", project: str):
+        self.store = store
+        self.project = project
+        self.files = None  # {path: [key, lines]} as of the last update()
+
+    @staticmethod
+    def _bump(stats: dict, fp: str, lines: int, sign: int):
+        ext = os.path.splitext(os.path.basename(fp))[1] or "no_ext"
+        e = stats["by_extension"].setdefault(ext, {"files": 0, "lines": 0})
+        e["files"] += sign
+        e["lines"] += sign * lines
+        stats["total_files"] += sign
+        stats["total_lines"] += sign * lines
+        if e["files"] <= 0:
+            del stats["by_extension"][ext]
+
+    def update(self, current: dict, count) -> Optional[dict]:
+        """current: {path: key}. count(keys) -> {key: lines} (None on failure)
+        is only called for keys not already cached. Returns the new totals."""
+        files = self.store.load_rows(self.project, "lines")
+        blobs = self.store.load_rows(self.project, "blobs")
+        stats = (self.store.load_doc(self.project, "line_stats")
+                 or {"total_files": 0, "total_lines": 0, "by_extension": {}})
+        need = sorted({key for fp, key in current.items()
+                       if key not in blobs and (fp not in files or files[fp][0] != key)})
+        counted = count(need) if need else {}
+        if counted is None:
+            return None
+        blobs.update(counted)
+
+        removed, upserts = [], {}
+        for fp in list(files):
+            if current.get(fp) != files[fp][0]:
+                self._bump(stats, fp, files.pop(fp)[1], -1)
+                removed.append(fp)
+        for fp, key in current.items():
+            if fp not in files:
+                lines = blobs.get(key)
+                # Uncountable files are stored keyless so the next run retries them
+                files[fp] = upserts[fp] = [key if lines is not None else None, lines or 0]
+                self._bump(stats, fp, lines or 0, +1)
+
+        self.files = files
+        self.store.apply_rows(self.project, "lines", upserts, [fp for fp in removed if fp not in upserts])
+        self.store.apply_rows(self.project, "blobs", counted, self.compact(files, blobs))
+        self.store.save_doc(self.project, "line_stats", stats)
+        return stats
+
+    @staticmethod
+    def compact(files: dict, blobs: dict, slack: int = 1024) -> list:
+        """Pooled keys to drop: once the pool is > 2x live paths, everything unreferenced."""
+        if len(blobs) <= 2 * len(files) + slack:
+            return []
+        live = {key for key, _ in files.values()}
+        return [k for k in blobs if k not in live]
+
+
 # ============================================================================
 # Change Detection
 # ============================================================================
 
 class ChangeDetector:
-    def __init__(self, project_config: dict, state_dir: Path):
+    def __init__(self, project_config: dict, state_dir: Path, scan_config: dict = None,
+                 store: StateStore = None):
         self.name = project_config["name"]
         self.path = Path(project_config["path"]).resolve()
         self.detection = project_config.get("detection", "auto")
-        self.include = project_config.get("include_patterns", ["**/*"])
-        self.exclude = list(project_config.get("exclude_patterns", []))
-        # Auto-exclude: generated files (note + daily files)
-        self._exclude_basenames = {"RESEARCH_NOTE.md"}
-        self._exclude_dirs = {"daily", "__pycache__"}
+        self.walker = ProjectWalker(project_config)
+        scan_config = scan_config or {}
+        # Trust an unchanged (size, mtime, inode) triple instead of re-hashing
+        self.trust_stat = scan_config.get("trust_stat", True)
+        # Re-hash everything every N days regardless (0 = never)
+        self.full_verify_days = scan_config.get("full_verify_days", 7)
+        self.force_full_verify = scan_config.get("full_verify", False)
+        self._hasher_args = (
+            scan_config.get("hash_algorithm", "md5"),
+            scan_config.get("chunk_size_kb", 1024) * 1024,
+            scan_config.get("sample_threshold_mb", 256),
+        )
+        self.hasher = FileHasher(*self._hasher_args)
+        self._hasher_args = (self.hasher.algorithm,) + self._hasher_args[1:]
+        self._local = threading.local()
+        # Hashing / line counting fan-out (I/O bound on NFS → threads)
+        self.workers = max(1, int(scan_config.get("workers", 1)))
+        self.errors = {}
         self.state_dir = state_dir
-        self.state_file = state_dir / f"{self.name}_state.json"
+        self.store = store or StateStore.open(state_dir)
+        self.line_cache = LineCountCache(self.store, self.name)
+        self.pending = None  # scan state of the last detect(), saved by commit()
 
     def detect(self) -> dict:
+        """Changes since the last committed scan. The new scan state is kept
+        pending until commit(), so changes whose entry was never written are
+        reported again by the next run."""
+        self.errors = {}
+        self.pending = None
         if self.detection == "git":
-            return self._detect_git()
+            changes = self._detect_git()
         elif self.detection == "mtime":
-            return self._detect_mtime()
+            changes = self._detect_mtime()
         else:
-            return self._detect_git() if self._is_git_repo() else self._detect_mtime()
+            changes = self._detect_git() if self._is_git_repo() else self._detect_mtime()
+        if self.errors:
+            changes["scan_errors"] = dict(sorted(self.errors.items()))
+        return changes
 
     def _is_git_repo(self) -> bool:
         try:
@@ -94,20 +815,30 @@ class ChangeDetector:
             "date": datetime.date.today().isoformat(),
             "modified": [], "new": [], "deleted": [], "commits": [], "diffs": {}, "stats": {},
         }
-        first_run = not self.state_file.exists()
+        scan = self.store.load_doc(self.name, "scan")
+        first_run = scan is None
         since = self._get_last_run_date() or "yesterday"
+        last_head = (scan or {}).get("head")
         try:
-            # First run: get ALL commits; subsequent: only since last run
+            head = self._git_head()
+            # First run: get ALL commits; subsequent: only those after the last run's HEAD
             if first_run:
                 r = subprocess.run(
                     ["git", "log", "--oneline", "--no-merges"],
                     cwd=self.path, capture_output=True, text=True, timeout=30
                 )
             else:
-                r = subprocess.run(
-                    ["git", "log", f"--since={since}", "--oneline", "--no-merges"],
-                    cwd=self.path, capture_output=True, text=True, timeout=30
-                )
+                r = None
+                if last_head:
+                    r = subprocess.run(
+                        ["git", "log", f"{last_head}..HEAD", "--oneline", "--no-merges"],
+                        cwd=self.path, capture_output=True, text=True, timeout=30
+                    )
+                if r is None or r.returncode != 0:  # no recorded HEAD, or it was rewritten away
+                    r = subprocess.run(
+                        ["git", "log", f"--since={since}", "--oneline", "--no-merges"],
+                        cwd=self.path, capture_output=True, text=True, timeout=30
+                    )
             if r.returncode == 0 and r.stdout.strip():
                 changes["commits"] = [l.strip() for l in r.stdout.strip().split("\n") if l.strip()]
 
@@ -122,15 +853,11 @@ class ChangeDetector:
                         if f.strip() and self._match(f.strip()):
                             changes["new"].append(f.strip())
             else:
-                r = subprocess.run(
-                    ["git", "diff", "--name-status", "HEAD~1"],
-                    cwd=self.path, capture_output=True, text=True, timeout=30
-                )
-                if r.returncode != 0 or not r.stdout.strip():
-                    r = subprocess.run(
-                        ["git", "diff", "--name-status"],
-                        cwd=self.path, capture_output=True, text=True, timeout=30
-                    )
+                # One streamed diff (name-status + patches) instead of a process per file:
+                # working tree against the last run's HEAD (or the previous commit)
+                batch = self._git_diff_batch(last_head or "HEAD~1")
+                if not batch or not batch[0]:
+                    batch = self._git_diff_batch()
                     u = subprocess.run(
                         ["git", "ls-files", "--others", "--exclude-standard"],
                         cwd=self.path, capture_output=True, text=True, timeout=30
@@ -140,14 +867,9 @@ class ChangeDetector:
                             if f.strip() and self._match(f.strip()):
                                 changes["new"].append(f.strip())
 
-                if r.returncode == 0 and r.stdout.strip():
-                    for line in r.stdout.strip().split("\n"):
-                        if not line.strip():
-                            continue
-                        parts = line.split("\t", 1)
-                        if len(parts) < 2:
-                            continue
-                        status, fp = parts[0].strip(), parts[1].strip()
+                if batch:
+                    entries, diffs, changes["churn"] = batch
+                    for status, fp in entries:
                         if not self._match(fp):
                             continue
                         if status.startswith("M"):
@@ -156,124 +878,305 @@ class ChangeDetector:
                             changes["new"].append(fp)
                         elif status.startswith("D"):
                             changes["deleted"].append(fp)
+                    changes["diffs"] = diffs
 
-                for fp in changes["modified"][:20]:
-                    dr = subprocess.run(
-                        ["git", "diff", "HEAD~1", "--", fp],
-                        cwd=self.path, capture_output=True, text=True, timeout=10
-                    )
-                    if dr.returncode == 0 and dr.stdout.strip():
-                        changes["diffs"][fp] = "\n".join(dr.stdout.strip().split("\n")[:50])
-
-            changes["stats"] = self._get_file_stats()
+            changes["stats"] = self._get_git_file_stats() or self._get_file_stats()
+            self._new_file_churn(changes)
+            # Saved by commit(): the next run diffs against this HEAD
+            self.pending = ({}, {}, dict(scan or {}, head=head))
         except (subprocess.TimeoutExpired, FileNotFoundError) as e:
             changes["error"] = str(e)
         return changes
 
+    def _git_head(self) -> Optional[str]:
+        """Commit SHA of HEAD (None in a repository without commits)."""
+        r = subprocess.run(
+            ["git", "rev-parse", "--verify", "-q", "HEAD"],
+            cwd=self.path, capture_output=True, text=True, timeout=10
+        )
+        return r.stdout.strip() if r.returncode == 0 else None
+
+    def _new_file_churn(self, changes: dict):
+        """New files count as churn equal to their (cached) line count, so the
+        context builder can rank them alongside diffed files."""
+        lines = self.line_cache.files or {}
+        churn = changes.setdefault("churn", {})
+        for fp in changes["new"]:
+            if fp not in churn and fp in lines:
+                churn[fp] = lines[fp][1]
+
+    def _git_diff_batch(self, *rev: str, timeout: int = 30, max_files: int = 20,
+                        max_lines: int = 400) -> Optional[tuple]:
+        """Run a single `git diff --patch-with-raw --numstat` and parse it in one pass.
+
+        Returns ([(status, path)], {path: diff}, {path: churn}) where churn is
+        added + deleted lines. Diffs are kept only for the `max_files` matching
+        modified files with the most churn, capped at `max_lines` lines each
+        (the context builder trims them further to the token budget).
+        Returns None if git fails.
+        """
+        cmd = ["git", "-c", "core.quotePath=false", "diff", "--patch-with-raw", "--numstat",
+               "--no-renames", *rev]
+        proc = subprocess.Popen(
+            cmd, cwd=self.path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, errors="replace"
+        )
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        entries, diffs, churn = [], {}, {}
+        wanted, idx, current = set(), -1, None
+        try:
+            phase = "raw"
+            for line in proc.stdout:
+                line = line.rstrip("\n")
+                if phase == "raw":
+                    # ":100644 100644 abc1234 def5678 M\tpath"
+                    if line.startswith(":"):
+                        meta, _, fp = line.partition("\t")
+                        entries.append((meta.split()[-1], fp))
+                        continue
+                    phase = "numstat"
+                if phase == "numstat":
+                    # "added\tdeleted\tpath" ("-\t-\tpath" for binary files)
+                    added, sep, rest = line.partition("\t")
+                    if sep and not line.startswith("diff --git "):
+                        deleted, _, fp = rest.partition("\t")
+                        churn[fp] = int(added) + int(deleted) if added.isdigit() and deleted.isdigit() else 0
+                        continue
+                    if not line.strip():
+                        continue
+                    phase = "patch"
+                    modified = [fp for st, fp in entries if st.startswith("M") and self._match(fp)]
+                    modified.sort(key=lambda fp: -churn.get(fp, 0))
+                    wanted = set(modified[:max_files])
+                # Patch sections appear in the same order as the raw entries
+                if line.startswith("diff --git "):
+                    idx += 1
+                    fp = entries[idx][1] if idx < len(entries) else None
+                    current = fp if fp in wanted else None
+                    if current:
+                        diffs[current] = [line]
+                elif current and len(diffs[current]) < max_lines:
+                    diffs[current].append(line)
+            proc.wait()
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if proc.returncode != 0:
+            return None
+        churn = {fp: n for fp, n in churn.items() if self._match(fp)}
+        return entries, {fp: "\n".join(lines).strip() for fp, lines in diffs.items()}, churn
+
     def _detect_mtime(self) -> dict:
         changes = {
             "method": "mtime", "project": self.name, "path": str(self.path),
             "date": datetime.date.today().isoformat(),
             "modified": [], "new": [], "deleted": [], "commits": [], "diffs": {}, "stats": {},
         }
-        current = self._scan_files()
-        previous = self._load_state()
+        records = self.walker.walk()
+        state = self._load_state()
+        previous = state["files"] if state else None
+        # Hashes from a different algorithm are not comparable → re-baseline
+        rebaseline = bool(state) and state.get("hash_algorithm", "md5") != self.hasher.algorithm
+        if rebaseline:
+            print(f"  [INFO] Hash algorithm changed ({state.get('hash_algorithm', 'md5')} → "
+                  f"{self.hasher.algorithm}): re-baselining {self.name}")
+        full_verify = rebaseline or self._needs_full_verify(state)
+        current = self._scan_files(records, None if full_verify else previous)
 
         if previous:
             prev_set, curr_set = set(previous.keys()), set(current.keys())
             changes["new"] = sorted(curr_set - prev_set)
             changes["deleted"] = sorted(prev_set - curr_set)
             for f in curr_set & prev_set:
-                if current[f]["hash"] != previous[f]["hash"]:
+                if rebaseline:
+                    changed = (current[f]["size"] != previous[f].get("size")
+                               or current[f]["mtime"] != previous[f].get("mtime"))
+                else:
+                    changed = current[f]["hash"] != previous[f]["hash"]
+                if changed:
                     changes["modified"].append(f)
             changes["modified"].sort()
         else:
             changes["new"] = sorted(current.keys())
 
-        self._save_state(current)
-        changes["stats"] = self._get_file_stats()
+        last_verify = datetime.date.today().isoformat() if full_verify else state["last_full_verify"]
+        self.pending = (previous or {}, current, {"last_full_verify": last_verify,
+                                                  "hash_algorithm": self.hasher.algorithm})
+        changes["stats"] = self._get_file_stats(records)
+        self._new_file_churn(changes)
         return changes
 
-    def _scan_files(self) -> dict:
+    def commit(self):
+        """Save the scan state of the last detect() (once its changes are written up)."""
+        if self.pending:
+            self._save_state(*self.pending)
+            self.pending = None
+
+    def _needs_full_verify(self, state: Optional[dict]) -> bool:
+        if not state or not self.trust_stat or self.force_full_verify:
+            return True
+        last = state.get("last_full_verify")
+        if not last:
+            return True
+        if self.full_verify_days <= 0:
+            return False
+        age = (datetime.date.today() - datetime.date.fromisoformat(last)).days
+        return age >= self.full_verify_days
+
+    def _scan_files(self, records: list = None, previous: dict = None) -> dict:
+        """Hash matching files. Entries in `previous` whose size/mtime/inode are
+        unchanged are reused as-is, so only touched files are read."""
         files = {}
-        for pattern in self.include:
-            for fp in self.path.glob(pattern):
-                if not fp.is_file():
-                    continue
-                rel = str(fp.relative_to(self.path))
-                if self._should_exclude(rel):
-                    continue
-                try:
-                    h = hashlib.md5(fp.read_bytes()).hexdigest()
-                    files[rel] = {"hash": h, "mtime": fp.stat().st_mtime, "size": fp.stat().st_size}
-                except (PermissionError, OSError):
-                    continue
-        return files
+        previous = previous or {}
+        to_hash = []
+        for rec in (records if records is not None else self.walker.walk()):
+            prev = previous.get(rec["path"])
+            if (prev and prev.get("size") == rec["size"] and prev.get("mtime") == rec["mtime"]
+                    and prev.get("ino") == rec["ino"]):
+                files[rec["path"]] = prev
+            else:
+                to_hash.append(rec)
+
+        for rec, h, err in run_pool(self._hash_record, to_hash, self.workers):
+            if err is not None:
+                self.errors[rec["path"]] = str(err)
+                continue
+            files[rec["path"]] = {"hash": h, "mtime": rec["mtime"], "size": rec["size"], "ino": rec["ino"]}
+        return dict(sorted(files.items()))
+
+    def _hash_record(self, rec: dict) -> str:
+        # One FileHasher (and chunk buffer) per worker thread
+        hasher = getattr(self._local, "hasher", None)
+        if hasher is None:
+            hasher = self._local.hasher = FileHasher(*self._hasher_args)
+        return hasher.hash(rec["abs"], rec["size"])
+
+    @staticmethod
+    def _count_lines(rec: dict) -> int:
+        with open(rec["abs"], "r", errors="ignore") as f:
+            return sum(1 for _ in f)
 
     def _match(self, fp: str) -> bool:
-        if self._should_exclude(fp):
-            return False
-        for p in self.include:
-            if fnmatch.fnmatch(fp, p):
-                return True
-            # **/ prefix: also match root-level files (e.g. **/*.py matches main.py)
-            if p.startswith("**/") and fnmatch.fnmatch(fp, p[3:]):
-                return True
-        return False
+        return self.walker.match(fp)
 
     def _should_exclude(self, fp: str) -> bool:
-        # Auto-exclude by basename
-        if os.path.basename(fp) in self._exclude_basenames:
-            return True
-        # Auto-exclude by directory component
-        parts = fp.replace("\\", "/").split("/")
-        if any(d in self._exclude_dirs for d in parts[:-1]):
-            return True
-        # User-defined patterns (fnmatch + ** handling)
-        for pattern in self.exclude:
-            if fnmatch.fnmatch(fp, pattern):
-                return True
-            if "**" in pattern:
-                simple = pattern.replace("**/", "").replace("/**", "").strip("/")
-                if simple in parts:
-                    return True
-        return False
-
-    def _get_file_stats(self) -> dict:
-        stats = {"total_files": 0, "total_lines": 0, "by_extension": {}}
-        for pattern in self.include:
-            for fp in self.path.glob(pattern):
-                if not fp.is_file() or self._should_exclude(str(fp.relative_to(self.path))):
+        return self.walker.should_exclude(fp)
+
+    def _get_file_stats(self, records: list = None) -> dict:
+        """Per-extension file/line counts; only files whose stat changed are read."""
+        records = records if records is not None else self.walker.walk()
+        current, by_key = {}, {}
+        for rec in records:
+            key = f"{rec['size']}:{rec['mtime']}:{rec['ino']}"
+            current[rec["path"]] = key
+            by_key.setdefault(key, rec)
+
+        def count(keys: list) -> dict:
+            counted = {}
+            for key, lc, err in run_pool(lambda k: self._count_lines(by_key[k]), keys, self.workers):
+                if err is not None:
+                    self.errors[by_key[key]["path"]] = str(err)
                     continue
-                ext = fp.suffix or "no_ext"
-                if ext not in stats["by_extension"]:
-                    stats["by_extension"][ext] = {"files": 0, "lines": 0}
-                stats["total_files"] += 1
-                stats["by_extension"][ext]["files"] += 1
-                try:
-                    lc = sum(1 for _ in open(fp, "r", errors="ignore"))
-                    stats["total_lines"] += lc
-                    stats["by_extension"][ext]["lines"] += lc
-                except (PermissionError, OSError):
-                    pass
-        return stats
+                counted[key] = lc
+            return counted
+
+        return self.line_cache.update(current, count)
+
+    def _get_git_file_stats(self) -> Optional[dict]:
+        """Per-extension file/line counts from the git object database.
+
+        `git ls-files -s` gives the blob OID of every tracked file; only blobs
+        not already in the line cache are read (one `git cat-file --batch`
+        process), and the cached totals are adjusted by the deltas.
+        Returns None if git is unavailable so callers can fall back to a walk.
+        """
+        r = subprocess.run(
+            ["git", "ls-files", "-s", "-z"],
+            cwd=self.path, capture_output=True, timeout=30
+        )
+        if r.returncode != 0:
+            return None
+        current = {}
+        for item in r.stdout.split(b"\0"):
+            if not item:
+                continue
+            # "<mode> <oid> <stage>\t<path>"
+            meta, _, raw_path = item.partition(b"\t")
+            mode, oid, _stage = meta.decode().split()
+            fp = raw_path.decode("utf-8", errors="surrogateescape")
+            if mode == "160000" or not self._match(fp):
+                continue  # submodule or not an included file
+            current[fp] = oid
+        return self.line_cache.update(current, self._git_count_blob_lines)
+
+    def _git_count_blob_lines(self, oids: list) -> Optional[dict]:
+        """Stream blobs through one `git cat-file --batch` and count their lines."""
+        proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=self.path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+
+        def feed():
+            try:
+                proc.stdin.write("".join(f"{oid}\n" for oid in oids).encode())
+            finally:
+                proc.stdin.close()
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        counts = {}
+        try:
+            for _ in oids:
+                header = proc.stdout.readline().split()
+                if len(header) < 3:
+                    continue  # "<oid> missing"
+                oid, size = header[0].decode(), int(header[2])
+                lines, remaining, last = 0, size, b""
+                while remaining:
+                    chunk = proc.stdout.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    lines += chunk.count(b"\n")
+                    remaining -= len(chunk)
+                    last = chunk[-1:]
+                proc.stdout.read(1)  # trailing LF after each object
+                # Same convention as iterating a text file: count a final unterminated line
+                counts[oid] = lines + (1 if size and last != b"\n" else 0)
+        finally:
+            writer.join()
+            proc.stdout.close()
+            proc.wait()
+        return counts if proc.returncode == 0 else None
 
     def _load_state(self) -> Optional[dict]:
-        if self.state_file.exists():
-            with open(self.state_file, "r") as f:
-                return json.load(f)
-        return None
+        """Returns {'files': {path: entry}, 'last_full_verify': str|None, 'hash_algorithm': str} or None."""
+        meta = self.store.load_doc(self.name, "scan")
+        if meta is None:
+            return None
+        return dict(meta, files=self.store.load_rows(self.name, "files"))
 
-    def _save_state(self, state: dict):
-        self.state_dir.mkdir(parents=True, exist_ok=True)
-        with open(self.state_file, "w") as f:
-            json.dump(state, f, indent=2)
+    def _save_state(self, previous: dict, current: dict, meta: dict):
+        """Write only the file entries that changed since `previous`."""
+        upserts = {fp: e for fp, e in current.items() if previous.get(fp) != e}
+        deletes = [fp for fp in previous if fp not in current]
+        self.store.apply_rows(self.name, "files", upserts, deletes)
+        self.store.save_doc(self.name, "scan", dict(meta, saved_at=datetime.date.today().isoformat()))
 
     def _get_last_run_date(self) -> Optional[str]:
-        if self.state_file.exists():
-            mt = datetime.datetime.fromtimestamp(self.state_file.stat().st_mtime)
-            return mt.strftime("%Y-%m-%d")
-        return None
+        meta = self.store.load_doc(self.name, "scan")
+        return meta.get("saved_at") if meta else None
 
 
 # ============================================================================
@@ -281,30 +1184,30 @@ class ChangeDetector:
 # ============================================================================
 
 class IdleDetector:
-    def __init__(self, config: dict, state_dir: Path):
+    def __init__(self, config: dict, state_dir: Path, store: StateStore = None):
         self.enabled = config.get("idle", {}).get("enabled", False)
         self.pause_days = config.get("idle", {}).get("pause_after_days", 7)
         self.notify_on_pause = config.get("idle", {}).get("notify_on_pause", True)
         self.auto_resume = config.get("idle", {}).get("auto_resume", True)
         self.state_dir = state_dir
+        self.store = store or StateStore.open(state_dir)
 
     def check(self, project_name: str, has_changes: bool) -> dict:
-        """Returns {'should_run': bool, 'paused': bool, 'idle_days': int, 'just_resumed': bool}"""
+        """Returns {'should_run': bool, 'paused': bool, 'idle_days': int, 'just_resumed': bool,
+        'state': the updated idle state}. Nothing is saved until save(project_name, result)."""
         if not self.enabled:
-            return {"should_run": True, "paused": False, "idle_days": 0, "just_resumed": False}
+            return {"should_run": True, "paused": False, "idle_days": 0, "just_resumed": False,
+                    "state": None}
 
-        idle_file = self.state_dir / f"{project_name}_idle.json"
-        state = {}
-        if idle_file.exists():
-            with open(idle_file, "r") as f:
-                state = json.load(f)
+        state = self.store.load_doc(project_name, "idle") or {}
 
         today = datetime.date.today().isoformat()
         last_change = state.get("last_change_date", today)
         is_paused = state.get("paused", False)
         idle_days = (datetime.date.fromisoformat(today) - datetime.date.fromisoformat(last_change)).days
 
-        result = {"should_run": True, "paused": False, "idle_days": idle_days, "just_resumed": False}
+        result = {"should_run": True, "paused": False, "idle_days": idle_days, "just_resumed": False,
+                  "state": state}
 
         if has_changes:
             state["last_change_date"] = today
@@ -322,18 +1225,81 @@ class IdleDetector:
                 result["should_run"] = False
                 result["paused"] = True
 
-        with open(idle_file, "w") as f:
-            json.dump(state, f)
-
         return result
 
+    def save(self, project_name: str, result: dict):
+        """Persist the idle state computed by check()."""
+        if result.get("state") is not None:
+            self.store.save_doc(project_name, "idle", result["state"])
+
 
 # ============================================================================
 # Note Generator
 # ============================================================================
 
+class AIGenerationError(RuntimeError):
+    """An AI backend call failed. The current project/date is skipped; others continue."""
+
+
+def open_response_cache(config: dict, state_dir: Path = None, use_cache: bool = True) -> Optional[ContentCache]:
+    """Shared raw-response cache (state_dir/cache/responses), or None if disabled."""
+    cache_cfg = config.get("cache", {})
+    if not (state_dir and use_cache and cache_cfg.get("enabled", True)):
+        return None
+    return ContentCache(state_dir, "responses", cache_cfg.get("response_max_mb", 128),
+                        ttl_days=cache_cfg.get("response_ttl_days", 30))
+
+
+def cached_completion(cache: Optional[ContentCache], backend: str, model: str, prompt: str, call) -> Optional[str]:
+    """Return call()'s text for prompt, memoized on (backend, model, normalized prompt).
+
+    Normalization ignores line-ending and trailing-whitespace differences.
+    Empty results are not cached.
+    """
+    if cache is None:
+        return call()
+    key = _response_key(backend, model, prompt)
+    hit = cache.get(key)
+    if hit and hit.get("text"):
+        return hit["text"]
+    text = call()
+    if text and text.strip():
+        cache.put(key, {"backend": backend, "model": model, "text": text})
+    return text
+
+
+async def acached_completion(cache: Optional[ContentCache], backend: str, model: str, prompt: str, acall) -> str:
+    """cached_completion for a coroutine function."""
+    if cache is None:
+        return await acall()
+    key = _response_key(backend, model, prompt)
+    hit = cache.get(key)
+    if hit and hit.get("text"):
+        return hit["text"]
+    text = await acall()
+    if text and text.strip():
+        cache.put(key, {"backend": backend, "model": model, "text": text})
+    return text
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 UTF-8 bytes per token; Hangul is ~3 bytes/char)."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    """Cut text to about `tokens` (same estimate as estimate_tokens)."""
+    data = text.encode("utf-8")
+    return text if len(data) <= tokens * 4 else data[:tokens * 4].decode("utf-8", errors="ignore")
+
+
+def _response_key(backend: str, model: str, prompt: str) -> str:
+    normalized = "\n".join(l.rstrip() for l in prompt.replace("\r\n", "\n").strip().split("\n"))
+    return ContentCache.fingerprint(backend, model, hashlib.sha256(normalized.encode("utf-8")).hexdigest())
+
+
 class AIBackendDetector:
-    """Auto-detect available AI backends: claude_cli → anthropic_api → ollama.
+    """Availability probes for the AI backends (used by AIRouter).
     AI is REQUIRED - the tool cannot function without an AI backend."""
 
     _cache = {}  # Class-level cache for detection results
@@ -365,6 +1331,7 @@ class AIBackendDetector:
     @classmethod
     def check_ollama(cls) -> bool:
         if "ollama" not in cls._cache:
+            import urllib.request
             try:
                 req = urllib.request.Request("http://localhost:11434/api/tags")
                 with urllib.request.urlopen(req, timeout=5) as resp:
@@ -391,6 +1358,7 @@ class AIBackendDetector:
         if any(model in m for m in models):
             return True
         print(f"[AI] Pulling ollama model '{model}'... (this may take a while)")
+        import urllib.request
         try:
             data = json.dumps({"name": model, "stream": False}).encode("utf-8")
             req = urllib.request.Request(
@@ -408,32 +1376,11 @@ class AIBackendDetector:
             print(f"[WARN] Failed to pull model '{model}': {e}")
             return False
 
-    @classmethod
-    def resolve(cls, configured: str, ollama_model: str = "llama3.1:8b") -> str:
-        """Resolve 'auto' to the best available backend. Exits if none available."""
-        if configured != "auto":
-            return configured
-
-        # 1순위: Claude Code CLI (구독 필요)
-        if cls.check_claude_cli():
-            return "claude_cli"
-
-        # 2순위: Anthropic API Key
-        if cls.check_anthropic_api():
-            return "anthropic_api"
-
-        # 3순위: Ollama (로컬 LLM)
-        if cls.check_ollama():
-            cls.install_ollama_model(ollama_model)
-            return "ollama"
-
-        # AI 없음 → 사용 불가
-        cls._print_no_ai_error()
-        sys.exit(1)
-
     @classmethod
     def _print_no_ai_error(cls):
         """Print detailed error message when no AI backend is available."""
+        import urllib.error
+        import urllib.request
         print("")
         print("=" * 60)
         print("[ERROR] AI 백엔드를 찾을 수 없습니다.")
@@ -506,26 +1453,851 @@ class AIBackendDetector:
         print("=" * 60)
 
 
-class NoteGenerator:
+# ============================================================================
+# Async HTTP (--async)
+# ============================================================================
+
+class AsyncHTTP:
+    """Minimal HTTP/1.1 client on asyncio streams (stdlib only), used by the
+    --async path for Ollama. One connection per request."""
+
+    @staticmethod
+    async def _open(method: str, url: str, body: bytes, headers: dict):
+        import asyncio
+        import ssl
+        import urllib.parse
+        u = urllib.parse.urlsplit(url)
+        tls = u.scheme == "https"
+        reader, writer = await asyncio.open_connection(
+            u.hostname, u.port or (443 if tls else 80),
+            ssl=ssl.create_default_context() if tls else None)
+        path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        head = [f"{method} {path} HTTP/1.1", f"Host: {u.netloc}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            writer.close()
+            raise OSError(f"Malformed HTTP response from {u.netloc}: {status_line[:80]!r}")
+        resp_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            resp_headers[k.strip().lower()] = v.strip()
+        return reader, writer, status, resp_headers
+
+    @staticmethod
+    async def _body_chunks(reader, headers: dict):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    return
+                yield await reader.readexactly(size)
+                await reader.readexactly(2)  # CRLF after each chunk
+        elif "content-length" in headers:
+            yield await reader.readexactly(int(headers["content-length"]))
+        else:
+            yield await reader.read()
+
+    @classmethod
+    async def stream_lines(cls, method: str, url: str, body: bytes = b"", headers: dict = None):
+        """Yield response body lines as they arrive (NDJSON streaming)."""
+        reader, writer, status, resp_headers = await cls._open(method, url, body, headers or {})
+        try:
+            if status != 200:
+                data = b"".join([c async for c in cls._body_chunks(reader, resp_headers)])
+                raise OSError(f"HTTP {status}: {data[:200]!r}")
+            buf = b""
+            async for chunk in cls._body_chunks(reader, resp_headers):
+                *lines, buf = (buf + chunk).split(b"\n")
+                for line in lines:
+                    yield line
+            if buf:
+                yield buf
+        finally:
+            writer.close()
+
+
+# ============================================================================
+# AI Backends
+# ============================================================================
+
+class AIBackend:
+    """Shared AI backend (one per name and `general` config), used through AIRouter.
+
+    Subclasses implement `_stream(prompt, max_tokens, timeout)` as a generator
+    of text chunks and keep their connection/client alive between calls.
+    `complete()` adds the per-backend concurrency limit, the response cache
+    and time-to-first-token reporting on top.
+    """
+    name = ""
+    # True if complete_batch() (an asynchronous provider-side batch API) is available
+    supports_batch_api = False
+    # Max concurrent calls per backend (--jobs, backfill); config: general.ai_concurrency
+    DEFAULT_CONCURRENCY = {"claude_cli": 2, "anthropic_api": 4, "ollama": 1}
+    # Token budget for the change context of one entry; config: general.context_tokens
+    # (keys may be a backend name or a model name, model wins)
+    DEFAULT_CONTEXT_TOKENS = {"claude_cli": 24000, "anthropic_api": 24000, "ollama": 3000}
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, config: dict):
+        general = config.get("general", {})
+        limits = dict(self.DEFAULT_CONCURRENCY, **general.get("ai_concurrency", {}))
+        self.concurrency = max(1, int(limits.get(self.name, 1)))
+        self._slot = threading.BoundedSemaphore(self.concurrency)
+        self._aslot = None  # asyncio.Semaphore, created inside the running loop
+        self.model = "default"
+        self._context_cfg = dict(self.DEFAULT_CONTEXT_TOKENS, **general.get("context_tokens", {}))
+        self.observer = None  # callable(name, elapsed, ttft) after every real (uncached) call
+
+    @property
+    def context_tokens(self) -> int:
+        return int(self._context_cfg.get(self.model) or self._context_cfg.get(self.name) or 8000)
+
+    @classmethod
+    def create(cls, name: str, config: dict) -> "AIBackend":
+        """Shared instance of the backend called `name` for this `general` config."""
+        key = (name, ContentCache.fingerprint(config.get("general", {})))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                impl = {b.name: b for b in cls.__subclasses__()}.get(name)
+                if impl is None:
+                    raise AIGenerationError(f"Unknown AI backend: {name}")
+                cls._instances[key] = impl(config)
+            return cls._instances[key]
+
+    def complete(self, prompt: str, max_tokens: int = 4096, timeout: float = None,
+                 cache: Optional[ContentCache] = None) -> str:
+        """Full response text for prompt. Raises AIGenerationError on failure or empty output."""
+        def call():
+            chunks, ttft = [], None
+            with self._slot:
+                t0 = time.perf_counter()
+                try:
+                    for chunk in self._stream(prompt, max_tokens, timeout):
+                        if ttft is None and chunk.strip():
+                            ttft = time.perf_counter() - t0
+                        chunks.append(chunk)
+                except AIGenerationError:
+                    raise
+                except Exception as e:
+                    raise AIGenerationError(f"{self.name} call failed: {e}")
+                elapsed = time.perf_counter() - t0
+            return self._finish("".join(chunks), ttft, elapsed)
+
+        return cached_completion(cache, self.name, self.model, prompt, call)
+
+    async def acomplete(self, prompt: str, max_tokens: int = 4096, timeout: float = None,
+                        cache: Optional[ContentCache] = None) -> str:
+        """Async complete(). On timeout or cancellation the in-flight request is
+        torn down (the claude subprocess is killed, the HTTP stream closed)."""
+        import asyncio
+
+        async def collect(state: dict):
+            async for chunk in self._astream(prompt, max_tokens):
+                if state["ttft"] is None and chunk.strip():
+                    state["ttft"] = time.perf_counter() - state["t0"]
+                state["chunks"].append(chunk)
+
+        async def call():
+            if self._aslot is None:
+                self._aslot = asyncio.Semaphore(self.concurrency)
+            async with self._aslot:
+                state = {"t0": time.perf_counter(), "ttft": None, "chunks": []}
+                try:
+                    await asyncio.wait_for(collect(state), timeout)
+                except asyncio.TimeoutError:
+                    raise AIGenerationError(f"{self.name} timed out after {timeout}s")
+                except (AIGenerationError, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    raise AIGenerationError(f"{self.name} call failed: {e}")
+                elapsed = time.perf_counter() - state["t0"]
+            return self._finish("".join(state["chunks"]), state["ttft"], elapsed)
+
+        return await acached_completion(cache, self.name, self.model, prompt, call)
+
+    def _finish(self, text: str, ttft: Optional[float], elapsed: float) -> str:
+        if not text.strip():
+            raise AIGenerationError(f"{self.name} returned an empty response")
+        ttft_str = f"{ttft:.1f}s" if ttft is not None else "n/a"
+        print(f"  [AI] {self.name}: first token {ttft_str}, done in {elapsed:.1f}s "
+              f"({len(text)} chars)")
+        if self.observer:
+            self.observer(self.name, elapsed, ttft)
+        return text
+
+    def _stream(self, prompt: str, max_tokens: int, timeout: Optional[float]):
+        raise NotImplementedError
+
+    async def _astream(self, prompt: str, max_tokens: int):
+        """Async chunk generator; timeouts are applied by acomplete()."""
+        raise NotImplementedError
+        yield  # pragma: no cover - makes this an async generator
+
+
+class ClaudeCLIBackend(AIBackend):
+    """`claude --print`; stdout is read incrementally as the CLI writes it."""
+    name = "claude_cli"
+
+    def _stream(self, prompt: str, max_tokens: int, timeout: Optional[float]):
+        try:
+            proc = subprocess.Popen(["claude", "--print", "-p", prompt], stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, text=True, encoding="utf-8")
+        except FileNotFoundError as e:
+            print(f"[ERROR] Claude CLI failed: {e}")
+            raise AIGenerationError(f"Claude CLI failed: {e}")
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            for line in proc.stdout:
+                yield line
+            proc.wait()
+        finally:
+            if timer:
+                timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+        if timed_out.is_set():
+            raise AIGenerationError(f"Claude CLI timed out after {timeout}s")
+        if proc.returncode != 0:
+            raise AIGenerationError(f"Claude CLI returned no output (exit {proc.returncode})")
+
+    async def _astream(self, prompt: str, max_tokens: int):
+        import asyncio
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "claude", "--print", "-p", prompt,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        except FileNotFoundError as e:
+            print(f"[ERROR] Claude CLI failed: {e}")
+            raise AIGenerationError(f"Claude CLI failed: {e}")
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            while True:
+                data = await proc.stdout.read(4096)
+                if not data:
+                    break
+                yield decoder.decode(data)
+            yield decoder.decode(b"", final=True)
+            await proc.wait()
+        finally:
+            if proc.returncode is None:  # timed out / cancelled
+                proc.kill()
+                await proc.wait()
+        if proc.returncode != 0:
+            raise AIGenerationError(f"Claude CLI returned no output (exit {proc.returncode})")
+
+
+class AnthropicAPIBackend(AIBackend):
+    """Anthropic Messages API through one client reused for the whole process."""
+    name = "anthropic_api"
+    DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
+    supports_batch_api = True
+
     def __init__(self, config: dict):
+        super().__init__(config)
+        self.model = config.get("general", {}).get("anthropic", {}).get("model", self.DEFAULT_MODEL)
+        self._client = None
+        self._async_client = None
+        self._client_lock = threading.Lock()
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    import anthropic
+                except ImportError:
+                    print("[ERROR] anthropic 패키지가 설치되지 않았습니다: pip install anthropic")
+                    raise AIGenerationError("anthropic package not installed")
+                api_key = os.environ.get("ANTHROPIC_API_KEY")
+                if not api_key:
+                    print("[ERROR] ANTHROPIC_API_KEY 환경변수가 설정되지 않았습니다")
+                    raise AIGenerationError("ANTHROPIC_API_KEY not set")
+                self._client = anthropic.Anthropic(api_key=api_key)
+            return self._client
+
+    def _stream(self, prompt: str, max_tokens: int, timeout: Optional[float]):
+        client = self._get_client()
+        if timeout:
+            client = client.with_options(timeout=timeout)
+        try:
+            with client.messages.stream(model=self.model, max_tokens=max_tokens,
+                                        messages=[{"role": "user", "content": prompt}]) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            print(f"[ERROR] Anthropic API 호출 실패: {e}")
+            raise AIGenerationError(f"Anthropic API call failed: {e}")
+
+    def complete_batch(self, prompts: dict, max_tokens: int = 4096, cache: Optional[ContentCache] = None,
+                       poll_sec: float = 30, max_wait: float = 3600) -> dict:
+        """Run {custom_id: prompt} through the Message Batches API (half the
+        per-token price; results can take minutes to hours). A batch still
+        running after max_wait seconds is cancelled. Returns {custom_id: text}
+        for the requests that succeeded; the caller falls back to complete()
+        for the rest."""
+        out, todo = {}, {}
+        for cid, prompt in prompts.items():
+            hit = cache.get(_response_key(self.name, self.model, prompt)) if cache else None
+            if hit and hit.get("text"):
+                out[cid] = hit["text"]
+            else:
+                todo[cid] = prompt
+        if not todo:
+            return out
+        client = self._get_client()
+        try:
+            batch = client.messages.batches.create(requests=[
+                {"custom_id": cid, "params": {"model": self.model, "max_tokens": max_tokens,
+                                              "messages": [{"role": "user", "content": prompt}]}}
+                for cid, prompt in todo.items()])
+        except Exception as e:
+            print(f"[WARN] Message Batches API unavailable ({e}), using individual requests")
+            return out
+        print(f"  [AI] Submitted {len(todo)} requests as message batch {batch.id}")
+        deadline = time.time() + max_wait
+        try:
+            while batch.processing_status != "ended":
+                if time.time() > deadline:
+                    print(f"[WARN] Message batch {batch.id} not finished after {max_wait:.0f}s, cancelling")
+                    client.messages.batches.cancel(batch.id)
+                    return out
+                time.sleep(max(0.0, min(poll_sec, deadline - time.time())))
+                batch = client.messages.batches.retrieve(batch.id)
+            for item in client.messages.batches.results(batch.id):
+                if item.result.type != "succeeded":
+                    continue
+                text = "".join(b.text for b in item.result.message.content if getattr(b, "type", "") == "text")
+                if text.strip():
+                    out[item.custom_id] = text
+                    if cache:
+                        cache.put(_response_key(self.name, self.model, todo[item.custom_id]),
+                                  {"backend": self.name, "model": self.model, "text": text})
+        except Exception as e:
+            print(f"[WARN] Message batch {batch.id} failed ({e}), using individual requests")
+        print(f"  [AI] Message batch {batch.id}: {len(out)}/{len(prompts)} succeeded")
+        return out
+
+    async def _astream(self, prompt: str, max_tokens: int):
+        import asyncio
+        if self._async_client is None:
+            import anthropic
+            self._get_client()  # validates package + API key
+            self._async_client = anthropic.AsyncAnthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        try:
+            async with self._async_client.messages.stream(
+                    model=self.model, max_tokens=max_tokens,
+                    messages=[{"role": "user", "content": prompt}]) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Anthropic API 호출 실패: {e}")
+            raise AIGenerationError(f"Anthropic API call failed: {e}")
+
+
+class OllamaBackend(AIBackend):
+    """Ollama /api/generate with "stream": true over pooled keep-alive connections."""
+    name = "ollama"
+    HOST, PORT = "localhost", 11434
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.model = config.get("general", {}).get("ollama", {}).get("model", "llama3.1:8b")
+        self._pool = []  # idle http.client connections
+        self._pool_lock = threading.Lock()
+
+    def _acquire(self, timeout: Optional[float]):
+        import http.client
+        with self._pool_lock:
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = http.client.HTTPConnection(self.HOST, self.PORT, timeout=timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock:
+                conn.sock.settimeout(timeout)
+        return conn
+
+    def _release(self, conn):
+        with self._pool_lock:
+            self._pool.append(conn)
+
+    def _payload(self, prompt: str, max_tokens: int) -> bytes:
+        return json.dumps({
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {"temperature": 0.3, "num_predict": max_tokens},
+        }).encode("utf-8")
+
+    @staticmethod
+    def _connect_failed(e: Exception) -> AIGenerationError:
+        print(f"[ERROR] Ollama 호출 실패: {e}")
+        print("  → ollama serve 실행 여부 확인")
+        print("  → ollama list 로 모델 확인")
+        return AIGenerationError(f"Ollama call failed: {e}")
+
+    def _stream(self, prompt: str, max_tokens: int, timeout: Optional[float]):
+        import http.client
+        conn = self._acquire(timeout)
+        reusable = False
+        try:
+            for attempt in range(2):
+                try:
+                    conn.request("POST", "/api/generate", body=self._payload(prompt, max_tokens),
+                                 headers={"Content-Type": "application/json"})
+                    resp = conn.getresponse()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                    conn.close()  # server closed an idle pooled connection; reconnects on next request
+                    if attempt:
+                        raise self._connect_failed(e)
+                except OSError as e:
+                    raise self._connect_failed(e)
+            if resp.status != 200:
+                raise AIGenerationError(f"Ollama returned HTTP {resp.status}: {resp.read()[:200]!r}")
+            # One JSON object per line; stop as soon as Ollama reports done
+            for line in iter(resp.readline, b""):
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("error"):
+                    raise AIGenerationError(f"Ollama error: {event['error']}")
+                yield event.get("response", "")
+                if event.get("done"):
+                    resp.read()  # drain the terminating chunk so the connection can be reused
+                    reusable = True
+                    break
+        finally:
+            if reusable:
+                self._release(conn)
+            else:
+                conn.close()
+
+    async def _astream(self, prompt: str, max_tokens: int):
+        lines = AsyncHTTP.stream_lines("POST", f"http://{self.HOST}:{self.PORT}/api/generate",
+                                       self._payload(prompt, max_tokens),
+                                       {"Content-Type": "application/json"})
+        try:
+            while True:
+                try:
+                    line = await lines.__anext__()
+                except StopAsyncIteration:
+                    return
+                except OSError as e:
+                    raise self._connect_failed(e)
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("error"):
+                    raise AIGenerationError(f"Ollama error: {event['error']}")
+                yield event.get("response", "")
+                if event.get("done"):
+                    return
+        finally:
+            await lines.aclose()
+
+
+class AIRouter:
+    """Ordered AI backends with persisted health and circuit breaking.
+
+    Candidates are general.ai_backend first (unless "auto"), then
+    general.ai_fallback (default claude_cli → anthropic_api → ollama). Each
+    backend's calls, errors, latency and circuit state live in the state
+    store's shared `ai_health` doc, so the next run already knows which backends
+    work: one that succeeded within `trust_hours` is used without re-probing,
+    and one whose circuit is open is skipped without any probe at all.
+
+    A failed call fails over to the next candidate. After `failure_threshold`
+    consecutive failures the circuit opens for `cooldown_min` (doubling on
+    every re-trip, capped at a day); once it expires the backend gets a single
+    trial call (half-open) that either closes the circuit or re-opens it.
+    Exposes the AIBackend interface, so callers never see which backend
+    answered.
+    """
+    ORDER = ["claude_cli", "anthropic_api", "ollama"]
+    MAX_COOLDOWN = 86400
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, config: dict, state_dir: Path = None, store: StateStore = None):
+        self.config = config
+        general = config.get("general", {})
+        configured = general.get("ai_backend", "auto")
+        fallback = general.get("ai_fallback", self.ORDER) or []
+        order = [] if configured == "auto" else [configured]
+        order += [b for b in fallback if b not in order]
+        known = {b.name for b in AIBackend.__subclasses__()}
+        for name in order:
+            if name not in known:
+                print(f"[WARN] Unknown AI backend '{name}' ignored")
+        self.order = [b for b in order if b in known]
+        router_cfg = general.get("ai_router", {})
+        self.failure_threshold = max(1, int(router_cfg.get("failure_threshold", 2)))
+        self.cooldown = float(router_cfg.get("cooldown_min", 30)) * 60
+        self.trust = float(router_cfg.get("trust_hours", 24)) * 3600
+        self.ollama_model = general.get("ollama", {}).get("model", "llama3.1:8b")
+        if store is None and state_dir:
+            store = StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+        self.store = store
+        self.health = self._load()
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()  # one probe at a time (an Ollama pull can take minutes)
+        self._available = {}  # name -> bool, probed at most once per process
+        self._trials = set()  # half-open backends whose single trial call is in flight
+        self.current = None  # first healthy candidate (the backend callers see)
+        self._reported = False
+
+    @classmethod
+    def get(cls, config: dict, state_dir: Path = None, store: StateStore = None) -> "AIRouter":
+        """Router shared by the NoteGenerator and WeeklyMerger of one run: one
+        per state_dir and `general`/`state` config, so a different config gets
+        its own. Nothing is probed here; backends are resolved on the first AI call."""
+        key = (str(Path(state_dir).resolve()) if state_dir else None,
+               ContentCache.fingerprint(config.get("general", {}), config.get("state", {})))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(config, state_dir, store)
+            return cls._instances[key]
+
+    # --- health ----------------------------------------------------------------
+    def _load(self) -> dict:
+        if not self.store:
+            return {}
+        try:
+            return self.store.load_doc(StateStore.SHARED, "ai_health") or {}
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable backend health: {e}")
+            return {}
+
+    def _save(self):
+        if not self.store:
+            return
+        try:
+            self.store.save_doc(StateStore.SHARED, "ai_health", self.health)
+        except Exception as e:
+            print(f"[WARN] Could not save backend health: {e}")
+
+    def _entry(self, name: str) -> dict:
+        return self.health.setdefault(name, {
+            "calls": 0, "errors": 0, "consecutive_failures": 0, "trips": 0,
+            "latency_avg": None, "ttft_avg": None,
+            "last_success": 0, "last_failure": 0, "last_error": "",
+            "open_until": 0, "unavailable_until": 0,
+        })
+
+    def _observe(self, name: str, elapsed: float, ttft: Optional[float]):
+        """AIBackend.observer: exponential moving average of real call latency."""
+        with self._lock:
+            h = self._entry(name)
+            for key, value in (("latency_avg", elapsed), ("ttft_avg", ttft)):
+                if value is not None:
+                    h[key] = round(value if h[key] is None else 0.7 * h[key] + 0.3 * value, 2)
+
+    def _record(self, name: str, error: str = None):
+        with self._lock:
+            h = self._entry(name)
+            now = time.time()
+            h["calls"] += 1
+            if error is None:
+                h.update(consecutive_failures=0, trips=0, open_until=0, unavailable_until=0,
+                         last_success=now)
+            else:
+                h["errors"] += 1
+                h["consecutive_failures"] += 1
+                h.update(last_failure=now, last_error=error[:300])
+                if h["consecutive_failures"] >= self.failure_threshold:
+                    self._trip(name, h, now)
+            self._save()
+
+    def _trip(self, name: str, h: dict, now: float):
+        cooldown = min(self.cooldown * 2 ** h["trips"], self.MAX_COOLDOWN)
+        h["trips"] += 1
+        h["open_until"] = now + cooldown
+        print(f"[WARN] {name}: circuit open for {cooldown / 60:.0f} min "
+              f"({h['consecutive_failures']} consecutive failures)")
+
+    def is_open(self, name: str) -> bool:
+        return self.health.get(name, {}).get("open_until", 0) > time.time()
+
+    def usable(self, name: str) -> bool:
+        """Open circuit → False without probing; recent success → True without
+        probing; otherwise probe once per process. A failed probe is
+        remembered for the cooldown so later runs skip it too. Probes block
+        (up to minutes for an Ollama pull): async callers go through
+        aresolve() / _acandidates(), which run this in a worker thread."""
+        if self.is_open(name) or self.health.get(name, {}).get("unavailable_until", 0) > time.time():
+            return False
+        if name not in self._available:
+            with self._probe_lock:
+                if name not in self._available:
+                    self._available[name] = self._probe(name)
+        return self._available[name]
+
+    def _probe(self, name: str) -> bool:
+        h = self.health.get(name, {})
+        if time.time() - h.get("last_success", 0) < self.trust:
+            return True
+        if name == "claude_cli":
+            ok = AIBackendDetector.check_claude_cli()
+        elif name == "anthropic_api":
+            ok = AIBackendDetector.check_anthropic_api()
+        else:
+            ok = AIBackendDetector.check_ollama() and AIBackendDetector.install_ollama_model(self.ollama_model)
+        if not ok:
+            with self._lock:
+                self._entry(name).update(last_error="not available",
+                                         unavailable_until=time.time() + self.cooldown)
+                self._save()
+        return ok
+
+    def _claim(self, name: str) -> bool:
+        """False if `name` is half-open (cooled down, not yet closed) and
+        another caller already holds its single trial call."""
+        with self._lock:
+            if not self.health.get(name, {}).get("open_until", 0):
+                return True  # closed
+            if name in self._trials:
+                return False
+            self._trials.add(name)
+            return True
+
+    def _end_trial(self, name: str):
+        with self._lock:
+            self._trials.discard(name)
+
+    # --- routing ---------------------------------------------------------------
+    def _backend(self, name: str) -> AIBackend:
+        backend = AIBackend.create(name, self.config)
+        backend.observer = self._observe
+        return backend
+
+    def resolve(self) -> Optional[AIBackend]:
+        """First usable candidate, or None (after printing why) if there is none."""
+        for name in self.order:
+            if self.usable(name):
+                if self.current is None or self.current.name != name:
+                    self.current = self._backend(name)
+                return self.current
+        if not self._reported:
+            self._reported = True
+            if any(self.is_open(n) for n in self.order):
+                print(f"[ERROR] All AI backends are unhealthy (circuits open, see --verbose)")
+            else:
+                AIBackendDetector._print_no_ai_error()
+        self.current = None
+        return None
+
+    async def aresolve(self) -> Optional[AIBackend]:
+        """resolve() with any probe run in a worker thread, off the event loop."""
+        return await run_in_thread(self.resolve)
+
+    def _candidates(self):
+        """Usable backends in failover order, current one first (half-open
+        ones only for the caller that claims their trial call)."""
+        first = self.resolve()
+        if first is None:
+            raise AIGenerationError("No AI backend available")
+        for name in self.order[self.order.index(first.name):]:
+            if (name == first.name or self.usable(name)) and self._claim(name):
+                yield first if name == first.name else self._backend(name)
+
+    async def _acandidates(self):
+        """_candidates() for acomplete(): probes run in a worker thread."""
+        first = await self.aresolve()
+        if first is None:
+            raise AIGenerationError("No AI backend available")
+        for name in self.order[self.order.index(first.name):]:
+            if (name == first.name or await run_in_thread(self.usable, name)) and self._claim(name):
+                yield first if name == first.name else self._backend(name)
+
+    def _failed(self, backend: AIBackend, error: Exception, errors: list):
+        errors.append(f"{backend.name}: {error}")
+        self._record(backend.name, str(error))
+        print(f"[WARN] {backend.name} failed ({error})")
+
+    def complete(self, prompt: str, **kwargs) -> str:
+        errors = []
+        for backend in self._candidates():
+            try:
+                text = backend.complete(prompt, **kwargs)
+                self._record(backend.name)
+                return text
+            except AIGenerationError as e:
+                self._failed(backend, e, errors)
+            finally:
+                self._end_trial(backend.name)
+        raise AIGenerationError("All AI backends failed: " + ("; ".join(errors) or "trial call in progress"))
+
+    async def acomplete(self, prompt: str, **kwargs) -> str:
+        errors = []
+        async for backend in self._acandidates():
+            try:
+                text = await backend.acomplete(prompt, **kwargs)
+                self._record(backend.name)
+                return text
+            except AIGenerationError as e:
+                self._failed(backend, e, errors)
+            finally:
+                self._end_trial(backend.name)
+        raise AIGenerationError("All AI backends failed: " + ("; ".join(errors) or "trial call in progress"))
+
+    def complete_batch(self, prompts: dict, **kwargs) -> dict:
+        """Provider batch API of the current backend; whatever it does not
+        return is retried by the caller through complete() (with failover)."""
+        backend = self.resolve()
+        if backend is None or not backend.supports_batch_api:
+            return {}
+        return backend.complete_batch(prompts, **kwargs)
+
+    # --- AIBackend interface of the current backend ----------------------------
+    def _attr(self, attr: str, default):
+        backend = self.resolve()
+        return getattr(backend, attr) if backend else default
+
+    @property
+    def name(self) -> str:
+        return self._attr("name", "none")
+
+    @property
+    def model(self) -> str:
+        return self._attr("model", "none")
+
+    @property
+    def concurrency(self) -> int:
+        return self._attr("concurrency", 1)
+
+    @property
+    def context_tokens(self) -> int:
+        return self._attr("context_tokens", 8000)
+
+    @property
+    def supports_batch_api(self) -> bool:
+        return self._attr("supports_batch_api", False)
+
+    def summary(self) -> list:
+        """One `[AI]` line per backend with recorded health."""
+        lines = []
+        for name in self.order:
+            h = self.health.get(name)
+            if not h or not h["calls"]:
+                continue
+            state = "open" if self.is_open(name) else "closed"
+            latency = f"{h['latency_avg']}s" if h["latency_avg"] is not None else "n/a"
+            lines.append(f"[AI] {name}: {h['calls']} calls, {h['errors']} errors, "
+                         f"avg {latency}, circuit {state}")
+        return lines
+
+
+class NoteGenerator:
+    # Bump whenever the daily entry prompt changes so cached entries are not reused
+    PROMPT_VERSION = "daily-v2"
+
+    # Marker line that precedes each entry in a packed (batch) response
+    ENTRY_MARKER = re.compile(r"^\s*<<<ENTRY (\d+)>>>\s*$", re.M)
+
+    def __init__(self, config: dict, state_dir: Path = None, use_cache: bool = True, batch: bool = None,
+                 verbose: bool = False, store: StateStore = None):
         self.config = config
-        ollama_cfg = config.get("general", {}).get("ollama", {})
-        self.ollama_model = ollama_cfg.get("model", "llama3.1:8b")
-        configured = config.get("general", {}).get("ai_backend", "auto")
-        self.ai_backend = AIBackendDetector.resolve(configured, self.ollama_model)
+        self.verbose = verbose
+        self.backend = AIRouter.get(config, state_dir, store)
+        self.ai_timeout = config.get("general", {}).get("ai_timeout_sec", 900) or None
+        batch_cfg = config.get("general", {}).get("batch", {})
+        self.batch = batch_cfg.get("enabled", False) if batch is None else batch
+        self.batch_size = max(1, int(batch_cfg.get("size", 5)))
+        self.batch_cfg = batch_cfg
         self.templates_dir = Path(__file__).parent / "templates"
+        cache_cfg = config.get("cache", {})
+        self.entry_cache = None
+        if state_dir and use_cache and cache_cfg.get("enabled", True):
+            self.entry_cache = ContentCache(state_dir, "entries", cache_cfg.get("entry_max_mb", 64))
+        self.response_cache = open_response_cache(config, state_dir, use_cache)
+
+    def print_stats(self):
+        """Cache hit rates and backend health (--verbose)."""
+        for cache in (self.entry_cache, self.response_cache):
+            if cache:
+                print(cache.summary())
+        for line in self.backend.summary():
+            print(line)
+
+    DAY_NAMES = {0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu", 4: "Fri", 5: "Sat", 6: "Sun"}
 
     def generate_daily_entry(self, changes: dict) -> str:
         today = get_date(self.config)
-        day_names = {0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu", 4: "Fri", 5: "Sat", 6: "Sun"}
-        day_name = day_names[today.weekday()]
+        return self._generate_entry(changes, today, self.DAY_NAMES[today.weekday()])
 
-        if self.ai_backend == "claude_cli":
-            return self._generate_with_claude_cli(changes, today, day_name)
-        elif self.ai_backend == "anthropic_api":
-            return self._generate_with_api(changes, today, day_name)
-        elif self.ai_backend == "ollama":
-            return self._generate_with_ollama(changes, today, day_name)
+    async def agenerate_daily_entry(self, changes: dict) -> str:
+        """generate_daily_entry for the --async path."""
+        today = get_date(self.config)
+        day_name = self.DAY_NAMES[today.weekday()]
+        await self.backend.aresolve()  # probe off the event loop; name/model below are then cached
+        key, hit = self._entry_cache_lookup(changes, today, day_name)
+        if hit:
+            return hit
+        out = await self.backend.acomplete(self._daily_prompt(changes, today, day_name), max_tokens=4096,
+                                           timeout=self.ai_timeout, cache=self.response_cache)
+        entry = self._format_entry(out)
+        self._entry_cache_store(key, entry, changes, today)
+        return entry
+
+    def _generate_entry(self, changes: dict, date, day_name: str) -> str:
+        """Generate a daily entry, reusing a cached one if the same changes were
+        already summarized with the same prompt version, backend and model."""
+        key, hit = self._entry_cache_lookup(changes, date, day_name)
+        if hit:
+            return hit
+        entry = self._call_backend(changes, date, day_name)
+        self._entry_cache_store(key, entry, changes, date)
+        return entry
+
+    def _entry_cache_lookup(self, changes: dict, date, day_name: str):
+        """(cache key, cached entry or None); the key is None when caching is off."""
+        if not self.entry_cache:
+            return None, None
+        key = ContentCache.fingerprint(changes, date.isoformat(), day_name, self.PROMPT_VERSION,
+                                       self.backend.name, self.backend.model)
+        hit = self.entry_cache.get(key)
+        if hit:
+            print(f"  [CACHE] Reusing generated entry for {date.isoformat()}")
+            return key, hit["entry"]
+        return key, None
+
+    def _entry_cache_store(self, key: Optional[str], entry: str, changes: dict, date):
+        if key and entry:
+            self.entry_cache.put(key, {"entry": entry, "date": date.isoformat(),
+                                       "project": changes.get("project")})
+
+    def _call_backend(self, changes: dict, date, day_name: str) -> str:
+        out = self.backend.complete(self._daily_prompt(changes, date, day_name), max_tokens=4096,
+                                    timeout=self.ai_timeout, cache=self.response_cache)
+        return self._format_entry(out)
+
+    def _format_entry(self, out: str) -> str:
+        cleaned = self._clean_ai_output(out)
+        return f"\n---\n\n{cleaned}\n\n---\n"
 
     @staticmethod
     def _clean_ai_output(text: str) -> str:
@@ -570,138 +2342,277 @@ class NoteGenerator:
         if first_heading_idx is not None and first_heading_idx > 0:
             result = '\n'.join(lines[first_heading_idx:])
 
-        return result.strip()
-
-    def _generate_with_claude_cli(self, changes: dict, today, day_name: str) -> str:
-        context = self._build_ai_context(changes)
-        prompt = (f"일일 연구노트 엔트리를 생성하세요.\n"
-                  f"마크다운 콘텐츠만 출력하세요. 인사말, 설명, 서문 등 절대 포함하지 마세요.\n"
-                  f"반드시 '# {today.isoformat()} ({day_name})'로 시작하세요.\n\n"
-                  f"**언어 규칙 (반드시 준수)**:\n"
-                  f"- 섹션 제목(##)은 영어로 작성\n"
-                  f"- 본문 내용은 반드시 한국어로 작성 (영어 금지)\n"
-                  f"- 코드명, 파일명, 기술 용어는 영어 그대로 사용 가능\n"
-                  f"- 변경사항이 적어도 구체적이고 상세하게 한국어로 분석하세요\n\n"
-                  f"Project: {changes['project']}\n\n"
-                  f"{context}\n\n"
-                  f"Sections (in order):\n"
-                  f"# {today.isoformat()} ({day_name})\n"
-                  f"## Changes Summary\n"
-                  f"## Key Changes Detail\n"
-                  f"## Architecture Updates\n"
-                  f"## Issues & Solutions (증상→원인→시도→해결)\n"
-                  f"## Training / Experiment Status\n"
-                  f"## Lessons Learned\n\n"
-                  f"서문 없이 바로 # 헤딩으로 시작하세요.")
-        try:
-            r = subprocess.run(
-                ["claude", "--print", "-p", prompt],
-                capture_output=True, text=True, timeout=None
-            )
-            if r.returncode == 0 and r.stdout.strip():
-                cleaned = self._clean_ai_output(r.stdout)
-                return f"\n---\n\n{cleaned}\n\n---\n"
-        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-            print(f"[ERROR] Claude CLI failed: {e}")
-            sys.exit(1)
-
-    def _generate_with_api(self, changes: dict, today, day_name: str) -> str:
-        try:
-            import anthropic
-        except ImportError:
-            print("[ERROR] anthropic 패키지가 설치되지 않았습니다: pip install anthropic")
-            sys.exit(1)
-        api_key = os.environ.get("ANTHROPIC_API_KEY")
-        if not api_key:
-            print("[ERROR] ANTHROPIC_API_KEY 환경변수가 설정되지 않았습니다")
-            sys.exit(1)
-        context = self._build_ai_context(changes)
-        prompt = (f"일일 연구노트 엔트리를 생성하세요.\n"
-                  f"마크다운 콘텐츠만 출력하세요. 인사말, 설명, 서문 등 절대 포함하지 마세요.\n"
-                  f"반드시 '# {today.isoformat()} ({day_name})'로 시작하세요.\n\n"
-                  f"**언어 규칙 (반드시 준수)**:\n"
-                  f"- 섹션 제목(##)은 영어로 작성\n"
-                  f"- 본문 내용은 반드시 한국어로 작성 (영어 금지)\n"
-                  f"- 코드명, 파일명, 기술 용어는 영어 그대로 사용 가능\n"
-                  f"- 변경사항이 적어도 구체적이고 상세하게 한국어로 분석하세요\n\n"
-                  f"Project: {changes['project']}\n\n"
-                  f"{context}\n\n"
-                  f"Sections: # date, ## Changes Summary, ## Key Changes Detail, "
-                  f"## Architecture Updates, ## Issues & Solutions, "
-                  f"## Training / Experiment Status, ## Lessons Learned.\n\n"
-                  f"서문 없이 바로 # 헤딩으로 시작하세요.")
-        try:
-            client = anthropic.Anthropic(api_key=api_key)
-            msg = client.messages.create(
-                model="claude-sonnet-4-5-20250929", max_tokens=4096,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            cleaned = self._clean_ai_output(msg.content[0].text)
-            return f"\n---\n\n{cleaned}\n\n---\n"
-        except Exception as e:
-            print(f"[ERROR] Anthropic API 호출 실패: {e}")
-            sys.exit(1)
+        return result.strip()
 
-    def _generate_with_ollama(self, changes: dict, today, day_name: str) -> str:
+    DAILY_RULES = ("**언어 규칙 (반드시 준수)**:\n"
+                   "- 섹션 제목(##)은 영어로 작성\n"
+                   "- 본문 내용은 반드시 한국어로 작성 (영어 금지)\n"
+                   "- 코드명, 파일명, 기술 용어는 영어 그대로 사용 가능\n"
+                   "- 변경사항이 적어도 구체적이고 상세하게 한국어로 분석하세요\n\n")
+    DAILY_SECTIONS = ("## Changes Summary\n"
+                      "## Key Changes Detail\n"
+                      "## Architecture Updates\n"
+                      "## Issues & Solutions (증상→원인→시도→해결)\n"
+                      "## Training / Experiment Status\n"
+                      "## Lessons Learned\n\n")
+
+    def _daily_prompt(self, changes: dict, today, day_name: str) -> str:
         context = self._build_ai_context(changes)
-        prompt = (f"일일 연구노트 엔트리를 생성하세요.\n"
-                  f"마크다운 콘텐츠만 출력하세요. 인사말, 설명, 서문 등 절대 포함하지 마세요.\n"
-                  f"반드시 '# {today.isoformat()} ({day_name})'로 시작하세요.\n\n"
-                  f"**언어 규칙 (반드시 준수)**:\n"
-                  f"- 섹션 제목(##)은 영어로 작성\n"
-                  f"- 본문 내용은 반드시 한국어로 작성 (영어 금지)\n"
-                  f"- 코드명, 파일명, 기술 용어는 영어 그대로 사용 가능\n"
-                  f"- 변경사항이 적어도 구체적이고 상세하게 한국어로 분석하세요\n\n"
-                  f"Project: {changes['project']}\n\n"
-                  f"{context}\n\n"
-                  f"Sections:\n"
-                  f"# {today.isoformat()} ({day_name})\n"
-                  f"## Changes Summary\n## Key Changes Detail\n"
-                  f"## Architecture Updates\n## Issues & Solutions\n"
-                  f"## Training / Experiment Status\n## Lessons Learned\n\n"
-                  f"서문 없이 바로 # 헤딩으로 시작하세요.")
-        try:
-            data = json.dumps({
-                "model": self.ollama_model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.3, "num_predict": 2048},
-            }).encode("utf-8")
-            req = urllib.request.Request(
-                "http://localhost:11434/api/generate",
-                data=data,
-                headers={"Content-Type": "application/json"},
-            )
-            with urllib.request.urlopen(req, timeout=180) as resp:
-                result = json.loads(resp.read().decode())
-            response_text = result.get("response", "").strip()
-            if response_text:
-                cleaned = self._clean_ai_output(response_text)
-                return f"\n---\n\n{cleaned}\n\n---\n"
-        except Exception as e:
-            print(f"[ERROR] Ollama 호출 실패: {e}")
-            print("  → ollama serve 실행 여부 확인")
-            print("  → ollama list 로 모델 확인")
-            sys.exit(1)
+        return (f"일일 연구노트 엔트리를 생성하세요.\n"
+                f"마크다운 콘텐츠만 출력하세요. 인사말, 설명, 서문 등 절대 포함하지 마세요.\n"
+                f"반드시 '# {today.isoformat()} ({day_name})'로 시작하세요.\n\n"
+                f"{self.DAILY_RULES}"
+                f"Project: {changes['project']}\n\n"
+                f"{context}\n\n"
+                f"Sections (in order):\n"
+                f"# {today.isoformat()} ({day_name})\n"
+                f"{self.DAILY_SECTIONS}"
+                f"서문 없이 바로 # 헤딩으로 시작하세요.")
+
+    def _packed_prompt(self, items: list) -> str:
+        """One prompt for several (changes, date, day_name) items; the shared
+        rules and section list are sent once."""
+        parts = [f"일일 연구노트 엔트리 {len(items)}개를 한 번에 생성하세요.\n"
+                 f"마크다운 콘텐츠만 출력하세요. 인사말, 설명, 서문 등 절대 포함하지 마세요.\n"
+                 f"각 엔트리는 반드시 '<<<ENTRY 번호>>>' 한 줄로 시작하고, 바로 다음 줄은 "
+                 f"해당 입력의 '# 날짜 (요일)' 헤딩이어야 합니다. 입력마다 정확히 하나의 엔트리를 "
+                 f"입력 순서대로 출력하세요.\n\n"
+                 f"{self.DAILY_RULES}"
+                 f"Sections (각 엔트리마다, in order):\n"
+                 f"# 날짜 (요일)\n"
+                 f"{self.DAILY_SECTIONS}"]
+        for n, (changes, date, day_name) in enumerate(items, 1):
+            parts.append(f"=== INPUT {n}: Project {changes['project']}, "
+                         f"# {date.isoformat()} ({day_name}) ===\n"
+                         f"{self._build_ai_context(changes, self.backend.context_tokens // len(items))}\n")
+        parts.append("출력 형식:\n" + "\n".join(
+            f"<<<ENTRY {n}>>>\n# {date.isoformat()} ({day_name})\n..." for n, (_, date, day_name) in enumerate(items, 1)))
+        return "\n".join(parts)
 
-    def _build_ai_context(self, changes: dict) -> str:
-        parts = [f"Detection: {changes['method']}", f"Path: {changes['path']}", ""]
-        if changes["new"]:
-            parts += [f"NEW ({len(changes['new'])}):" ] + [f"  + {f}" for f in changes["new"]] + [""]
-        if changes["modified"]:
-            parts += [f"MODIFIED ({len(changes['modified'])}):" ] + [f"  M {f}" for f in changes["modified"]] + [""]
-        if changes["deleted"]:
-            parts += [f"DELETED ({len(changes['deleted'])}):" ] + [f"  - {f}" for f in changes["deleted"]] + [""]
-        if changes.get("commits"):
-            parts += ["COMMITS:"] + [f"  {c}" for c in changes["commits"]] + [""]
-        if changes.get("diffs"):
-            parts.append("DIFFS:")
-            for fp, diff in list(changes["diffs"].items())[:10]:
-                parts += [f"--- {fp} ---", diff, ""]
+    def _split_packed(self, text: str, items: list) -> list:
+        """Per-item entry texts from a packed response; None where an entry is
+        missing or does not start with the expected date heading."""
+        out = [None] * len(items)
+        pieces = self.ENTRY_MARKER.split(text)
+        for idx, body in zip(pieces[1::2], pieces[2::2]):
+            k = int(idx) - 1
+            if not (0 <= k < len(items)) or out[k] is not None:
+                continue
+            date = items[k][1].isoformat()
+            if re.search(rf"^#\s+{date}\b", body, re.M):
+                out[k] = body.strip()
+        return out
+
+    def generate_batch(self, items: list, on_result=None) -> list:
+        """Entries for many (changes, date, day_name) items with fewer AI requests.
+
+        Uncached items are packed `batch.size` per request (or, on anthropic_api
+        with enough items, submitted through the Message Batches API). Items whose
+        entry cannot be recovered from the batch response fall back to single
+        requests. Returns a list aligned with items holding the entry string or
+        the AIGenerationError; on_result(index, entry) is called as each entry
+        becomes available.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        results = [None] * len(items)
+        keys = [None] * len(items)
+        pending = []
+        for i, (changes, date, day_name) in enumerate(items):
+            keys[i], hit = self._entry_cache_lookup(changes, date, day_name)
+            if hit:
+                results[i] = hit
+                if on_result:
+                    on_result(i, hit)
+            else:
+                pending.append(i)
+
+        def accept(i: int, text: str):
+            results[i] = self._format_entry(text)
+            self._entry_cache_store(keys[i], results[i], items[i][0], items[i][1])
+            if on_result:
+                on_result(i, results[i])
+
+        use_api = (self.backend.supports_batch_api and self.batch_cfg.get("batches_api", True)
+                   and len(pending) >= int(self.batch_cfg.get("batches_api_min", 10)))
+        if use_api:
+            texts = self.backend.complete_batch(
+                {f"e{i}": self._daily_prompt(*items[i]) for i in pending}, max_tokens=4096,
+                cache=self.response_cache, poll_sec=float(self.batch_cfg.get("poll_sec", 30)),
+                max_wait=float(self.batch_cfg.get("max_wait_sec", 3600)))
+            for i in pending:
+                if texts.get(f"e{i}"):
+                    accept(i, texts[f"e{i}"])
+        else:
+            chunks = [pending[k:k + self.batch_size] for k in range(0, len(pending), self.batch_size)]
+            chunks = [c for c in chunks if len(c) > 1]  # singletons go straight to the fallback
+
+            def run_chunk(chunk: list):
+                sub = [items[i] for i in chunk]
+                try:
+                    text = self.backend.complete(self._packed_prompt(sub),
+                                                 max_tokens=min(4096 * len(sub), 32000),
+                                                 timeout=self.ai_timeout, cache=self.response_cache)
+                except AIGenerationError as e:
+                    print(f"  [WARN] Batch request failed ({e})")
+                    return chunk, [None] * len(chunk)
+                return chunk, self._split_packed(text, sub)
+
+            if chunks:
+                with ThreadPoolExecutor(max_workers=self.backend.concurrency) as ex:
+                    for chunk, texts in ex.map(run_chunk, chunks):
+                        for i, text in zip(chunk, texts):
+                            if text:
+                                accept(i, text)
+
+        missing = [i for i in pending if results[i] is None]
+        if missing and len(pending) > 1:
+            print(f"  [INFO] Generating {len(missing)} remaining entr(ies) with single requests")
+
+        def single(i: int):
+            try:
+                return i, self.backend.complete(self._daily_prompt(*items[i]), max_tokens=4096,
+                                                timeout=self.ai_timeout, cache=self.response_cache), None
+            except AIGenerationError as e:
+                return i, None, e
+
+        with ThreadPoolExecutor(max_workers=self.backend.concurrency) as ex:
+            for i, text, err in ex.map(single, missing):
+                if err:
+                    results[i] = err
+                else:
+                    accept(i, text)
+        return results
+
+    def _build_ai_context(self, changes: dict, budget: int = None) -> str:
+        """Change context for the prompt, fitted to a token budget (per backend/model).
+
+        Paths and diffs are ranked by churn (added + deleted lines). Long path
+        lists keep their top files and collapse the rest into per-directory
+        counts; diffs share what is left and are trimmed hunk by hunk.
+        """
+        budget = budget or self.backend.context_tokens
+        churn = changes.get("churn", {})
+        head = [f"Detection: {changes['method']}", f"Path: {changes['path']}", ""]
         stats = changes.get("stats", {})
-        if stats:
-            parts.append(f"STATS: {stats.get('total_files', 0)} files, {stats.get('total_lines', 0)} lines")
-        return "\n".join(parts)
+        tail = ([f"STATS: {stats.get('total_files', 0)} files, {stats.get('total_lines', 0)} lines"]
+                if stats else [])
+        remaining = budget - estimate_tokens("\n".join(head + tail))
+
+        # Commits: newest first, at most 15% of the budget
+        parts = list(head)
+        commits = changes.get("commits") or []
+        if commits:
+            section = self._fit_lines("COMMITS:", [f"  {c}" for c in commits], budget * 15 // 100,
+                                      lambda n: f"  ... (+{n} older commits)")
+            parts += section + [""]
+            remaining -= estimate_tokens("\n".join(section))
+
+        # Path lists share up to 40% of what is left, in proportion to their length
+        groups = [("NEW", "+", changes["new"]), ("MODIFIED", "M", changes["modified"]),
+                  ("DELETED", "-", changes["deleted"])]
+        list_budget = remaining * 40 // 100
+        total_paths = sum(len(paths) for _, _, paths in groups) or 1
+        for label, sym, paths in groups:
+            if paths:
+                share = max(list_budget * len(paths) // total_paths, 64)
+                section = self._render_paths(label, sym, paths, churn, share)
+                parts += section + [""]
+                remaining -= estimate_tokens("\n".join(section))
+
+        # Diffs: highest churn first, each gets a fair share of the rest
+        diffs = changes.get("diffs") or {}
+        if diffs:
+            parts.append("DIFFS:")
+            ranked = sorted(diffs, key=lambda fp: (-churn.get(fp, 0), fp))
+            omitted = []
+            for n, fp in enumerate(ranked):
+                share = remaining // (len(ranked) - n)
+                if share < 64:
+                    omitted.append(fp)
+                    continue
+                text = self._truncate_diff(diffs[fp], share)
+                parts += [f"--- {fp} ---", text, ""]
+                remaining -= estimate_tokens(text) + estimate_tokens(fp) + 2
+            if omitted:
+                parts += [f"(diffs omitted for {len(omitted)} file(s): {', '.join(omitted[:10])}"
+                          f"{' ...' if len(omitted) > 10 else ''})", ""]
+        context = "\n".join(parts + tail)
+        if self.verbose:
+            print(f"  [AI] Context: ~{estimate_tokens(context)} tokens (budget {budget}, "
+                  f"{self.backend.name}/{self.backend.model})")
+        return context
+
+    @staticmethod
+    def _fit_lines(title: str, lines: list, budget: int, more) -> list:
+        """title + as many lines as fit in budget, then more(n_dropped)."""
+        out, used = [title], estimate_tokens(title)
+        for n, line in enumerate(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                return out + [more(len(lines) - n)]
+            out.append(line)
+            used += cost
+        return out
+
+    @staticmethod
+    def _render_paths(label: str, sym: str, paths: list, churn: dict, budget: int) -> list:
+        """Path list within budget: top files by churn, the rest as directory counts."""
+        ranked = sorted(paths, key=lambda fp: (-churn.get(fp, 0), fp))
+        title = f"{label} ({len(paths)}):"
+        full = [title] + [f"  {sym} {fp}" for fp in ranked]
+        if estimate_tokens("\n".join(full)) <= budget:
+            return full
+        keep, used = [title], estimate_tokens(title)
+        for line in full[1:]:
+            if used + estimate_tokens(line) + 1 > budget // 2:
+                break
+            keep.append(line)
+            used += estimate_tokens(line) + 1
+        rest = ranked[len(keep) - 1:]
+        for depth in (3, 2, 1, 0):
+            by_dir = {}
+            for fp in rest:
+                by_dir.setdefault("/".join(fp.split("/")[:-1][:depth]), []).append(fp)
+            summary = []
+            for d, fps in sorted(by_dir.items(), key=lambda kv: (-len(kv[1]), kv[0])):
+                lines = sum(churn.get(fp, 0) for fp in fps)
+                summary.append(f"  {sym} {d + '/' if d else '(other)'} (+{len(fps)} files"
+                               f"{f', {lines} lines' if lines else ''})")
+            if used + estimate_tokens("\n".join(summary)) <= budget:
+                break
+        return keep + summary
+
+    @staticmethod
+    def _truncate_diff(diff: str, budget: int) -> str:
+        """Keep whole hunks while they fit; cut the first one that does not and
+        note how many were dropped."""
+        if estimate_tokens(diff) <= budget:
+            return diff
+        header, hunks = [], []
+        for line in diff.split("\n"):
+            if line.startswith("@@"):
+                hunks.append([line])
+            elif hunks:
+                hunks[-1].append(line)
+            else:
+                header.append(line)
+        out = list(header)
+        used = estimate_tokens("\n".join(header))
+        for n, hunk in enumerate(hunks):
+            cost = estimate_tokens("\n".join(hunk))
+            if used + cost <= budget:
+                out += hunk
+                used += cost
+                continue
+            for line in hunk:
+                used += estimate_tokens(line) + 1
+                if used > budget:
+                    break
+                out.append(line)
+            dropped = len(hunks) - n - 1
+            out.append(f"... (hunk truncated{f', {dropped} more hunk(s) omitted' if dropped else ''})")
+            break
+        return "\n".join(out)
 
     def _get_commits_by_date(self, project_path: Path) -> dict:
         """Get all commits grouped by date (YYYY-MM-DD)."""
@@ -732,62 +2643,94 @@ class NoteGenerator:
 
     def _get_files_by_mtime(self, project_config: dict) -> dict:
         """Get all files grouped by modification date (YYYY-MM-DD)."""
-        project_path = Path(project_config["path"]).resolve()
-        include_patterns = project_config.get("include_patterns", ["**/*"])
-        exclude_patterns = project_config.get("exclude_patterns", [])
-
         files_by_date = {}
         today = datetime.date.today()
 
-        for pattern in include_patterns:
-            for fp in project_path.glob(pattern):
-                if not fp.is_file():
-                    continue
-
-                rel_path = str(fp.relative_to(project_path))
-
-                # Check exclusions
-                should_exclude = False
-                for excl in exclude_patterns:
-                    if fnmatch.fnmatch(rel_path, excl):
-                        should_exclude = True
-                        break
-                if should_exclude or rel_path == "RESEARCH_NOTE.md":
-                    continue
-
-                try:
-                    mtime = fp.stat().st_mtime
-                    mtime_date = datetime.date.fromtimestamp(mtime)
+        for rec in ProjectWalker(project_config).walk():
+            mtime_date = datetime.date.fromtimestamp(rec["mtime"])
 
-                    # Skip today (will be handled by regular daily generation)
-                    if mtime_date >= today:
-                        continue
+            # Skip today (will be handled by regular daily generation)
+            if mtime_date >= today:
+                continue
 
-                    date_str = mtime_date.isoformat()
-                    if date_str not in files_by_date:
-                        files_by_date[date_str] = []
-                    files_by_date[date_str].append(rel_path)
-                except (OSError, PermissionError):
-                    continue
+            date_str = mtime_date.isoformat()
+            if date_str not in files_by_date:
+                files_by_date[date_str] = []
+            files_by_date[date_str].append(rec["path"])
 
         return files_by_date
 
-    def _backfill_from_mtime(self, project_config: dict, note_path: Path, files_by_date: dict):
+    def _backfill_dates(self, project_config: dict, note_path: Path, dates: list,
+                        build_changes, store: StateStore = None) -> int:
+        """Generate entries for `dates` on a bounded pool (packed into batch
+        requests in batch mode), then append them to the note once, in
+        chronological order.
+
+        Each finished entry is checkpointed to the state store (`backfill` rows)
+        as soon as it arrives, so a crashed --init resumes with only the missing
+        dates; the checkpoint is cleared once the note has been written.
+        """
+        name = project_config["name"]
+        done = store.load_rows(name, "backfill") if store else {}
+        done = {d: e for d, e in done.items() if d in set(dates)}
+        if done:
+            print(f"[INFO] Resuming backfill: {len(done)}/{len(dates)} days already generated")
+        todo = [d for d in dates if d not in done]
+        day_names = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+
+        def item(date_str: str) -> tuple:
+            date_obj = datetime.date.fromisoformat(date_str)
+            return build_changes(date_str), date_obj, day_names[date_obj.weekday()]
+
+        def finished(date_str: str, entry: str):
+            done[date_str] = entry
+            if store:
+                store.apply_rows(name, "backfill", {date_str: entry})
+            print(f"    ✓ {date_str} entry generated ({len(done)}/{len(dates)})")
+
+        if self.batch and len(todo) > 1:
+            results = self.generate_batch([item(d) for d in todo],
+                                          on_result=lambda i, entry: finished(todo[i], entry))
+            for date_str, res in zip(todo, results):
+                if isinstance(res, Exception):
+                    print(f"    ✗ Failed to generate entry for {date_str}: {res}")
+        else:
+            from concurrent.futures import ThreadPoolExecutor, as_completed
+            with ThreadPoolExecutor(max_workers=self.backend.concurrency) as ex:
+                futures = {ex.submit(lambda d: self._generate_entry(*item(d)), d): d for d in todo}
+                for fut in as_completed(futures):
+                    date_str = futures[fut]
+                    try:
+                        entry = fut.result()
+                    except Exception as e:
+                        print(f"    ✗ Failed to generate entry for {date_str}: {e}")
+                        continue
+                    finished(date_str, entry)
+
+        ordered = sorted(done)
+        if ordered:
+            result = NoteWriter.append_entries(note_path, [done[d] for d in ordered],
+                                               date_override=datetime.date.fromisoformat(ordered[-1]))
+            if result and store:
+                NoteIndex(store).record(name, note_path, ordered, result)
+        if store:
+            store.apply_rows(name, "backfill", {}, ordered)
+        return len(ordered)
+
+    def _backfill_from_mtime(self, project_config: dict, note_path: Path, files_by_date: dict,
+                             store: StateStore = None):
         """Generate backfill entries from mtime-grouped files."""
         sorted_dates = sorted(files_by_date.keys())
         print(f"[INFO] Backfilling {len(sorted_dates)} days from file modification times...")
 
-        for date_str in sorted_dates:
-            files = files_by_date[date_str]
-            print(f"  Processing {date_str} ({len(files)} files)...")
-
-            # Build changes dict (limited info without git)
-            changes = {
+        def build_changes(date_str: str) -> dict:
+            # Limited info without git
+            return {
                 "method": "mtime",
                 "project": project_config["name"],
                 "path": str(Path(project_config["path"]).resolve()),
                 "date": date_str,
-                "modified": files,
+                "modified": files_by_date[date_str],
                 "new": [],
                 "deleted": [],
                 "commits": [f"Files modified on {date_str}"],
@@ -795,28 +2738,10 @@ class NoteGenerator:
                 "stats": {}
             }
 
-            # Generate AI entry
-            try:
-                date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-                day_name = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"][date_obj.weekday()]
-
-                # Use AI to generate entry
-                if self.ai_backend == "claude_cli":
-                    entry = self._generate_with_claude_cli(changes, date_obj, day_name)
-                elif self.ai_backend == "anthropic_api":
-                    entry = self._generate_with_api(changes, date_obj, day_name)
-                elif self.ai_backend == "ollama":
-                    entry = self._generate_with_ollama(changes, date_obj, day_name)
-                else:
-                    continue
-
-                # Append to note
-                NoteWriter.append_entry(note_path, entry, date_override=date_obj)
-                print(f"    ✓ {date_str} entry added")
-            except Exception as e:
-                print(f"    ✗ Failed to generate entry for {date_str}: {e}")
+        added = self._backfill_dates(project_config, note_path, sorted_dates, build_changes, store)
+        print(f"[OK] Backfill complete: {added} daily entries added")
 
-    def _backfill_history(self, project_config: dict, note_path: Path):
+    def _backfill_history(self, project_config: dict, note_path: Path, store: StateStore = None):
         """Backfill daily entries from git history or mtime."""
         project_path = Path(project_config["path"]).resolve()
         commits_by_date = self._get_commits_by_date(project_path)
@@ -826,85 +2751,36 @@ class NoteGenerator:
             # Try mtime-based backfill
             files_by_date = self._get_files_by_mtime(project_config)
             if files_by_date:
-                self._backfill_from_mtime(project_config, note_path, files_by_date)
+                self._backfill_from_mtime(project_config, note_path, files_by_date, store)
             else:
                 print("[INFO] No file history to backfill")
 
             # Still remove placeholder comment
             if note_path.exists():
-                content = note_path.read_text(encoding="utf-8")
-                placeholder = "<!-- 날짜별 엔트리가 여기 아래에 최신순으로 쌓입니다 -->"
-                if placeholder in content:
-                    content = content.replace(placeholder, "").strip() + "\n"
-                    note_path.write_text(content, encoding="utf-8")
+                NoteWriter.remove_placeholder(note_path)
             return
 
         # Sort dates chronologically (oldest first)
         sorted_dates = sorted(commits_by_date.keys())
         print(f"[INFO] Backfilling {len(sorted_dates)} days from git history...")
 
-        for date_str in sorted_dates:
-            commits = commits_by_date[date_str]
-            print(f"  Processing {date_str} ({len(commits)} commits)...")
-
-            # Get changes for this date (all commits combined)
-            try:
-                # Get diff for the entire day
-                first_commit = commits[-1]["hash"]  # Oldest commit of the day
-                last_commit = commits[0]["hash"]    # Newest commit of the day
-
-                # Get parent of first commit
-                parent_r = subprocess.run(
-                    ["git", "rev-parse", f"{first_commit}^"],
-                    cwd=project_path, capture_output=True, text=True
-                )
-                if parent_r.returncode == 0:
-                    parent_hash = parent_r.stdout.strip()
-                else:
-                    # First commit in repo, compare with empty tree
-                    parent_hash = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
-
-                # Get combined diff
-                diff_r = subprocess.run(
-                    ["git", "diff", "--stat", parent_hash, last_commit],
-                    cwd=project_path, capture_output=True, text=True
-                )
-
-                # Build changes dict
-                changes = {
-                    "project": project_config["name"],
-                    "new": [],
-                    "modified": [],
-                    "deleted": [],
-                    "commits": [f"{c['hash'][:7]} {c['subject']}" for c in commits],
-                    "diffs": {},
-                    "stats": {}
-                }
-
-                # Generate AI entry
-                from datetime import datetime
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-                day_name = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"][date_obj.weekday()]
-
-                # Use AI to generate entry
-                if self.ai_backend == "claude_cli":
-                    entry = self._generate_with_claude_cli(changes, date_obj, day_name)
-                elif self.ai_backend == "anthropic_api":
-                    entry = self._generate_with_api(changes, date_obj, day_name)
-                elif self.ai_backend == "ollama":
-                    entry = self._generate_with_ollama(changes, date_obj, day_name)
-                else:
-                    continue
-
-                # Append to note
-                NoteWriter.append_entry(note_path, entry, date_override=date_obj)
-                print(f"    ✓ {date_str} entry added")
-
-            except Exception as e:
-                print(f"    ✗ Failed to process {date_str}: {e}")
-                continue
+        def build_changes(date_str: str) -> dict:
+            # All commits of the day combined
+            return {
+                "method": "git",
+                "project": project_config["name"],
+                "path": str(project_path),
+                "date": date_str,
+                "new": [],
+                "modified": [],
+                "deleted": [],
+                "commits": [f"{c['hash'][:7]} {c['subject']}" for c in commits_by_date[date_str]],
+                "diffs": {},
+                "stats": {}
+            }
 
-        print(f"[OK] Backfill complete: {len(sorted_dates)} daily entries added")
+        added = self._backfill_dates(project_config, note_path, sorted_dates, build_changes, store)
+        print(f"[OK] Backfill complete: {added} daily entries added")
 
     def generate_initial_note(self, project_config: dict) -> str:
         template_path = self.templates_dir / "initial_note.md"
@@ -917,8 +2793,6 @@ class NoteGenerator:
             last_updated=today, current_version="v1",
         )
 
-        # AI is required - resolve() already ensures this
-
         project_path = Path(project_config["path"]).resolve()
         # Gather project context: file list + git log
         context_parts = [f"Project: {project_config['name']}", f"Path: {project_path}", ""]
@@ -969,49 +2843,15 @@ class NoteGenerator:
             f"=== 프로젝트 정보 ===\n{context}"
         )
 
-        if self.ai_backend == "claude_cli":
-            try:
-                r = subprocess.run(
-                    ["claude", "-p", prompt], capture_output=True, text=True, timeout=None
-                )
-                if r.returncode == 0 and r.stdout.strip():
-                    result = self._clean_init_output(r.stdout.strip())
-                    # Ensure it has the Daily Log section
-                    if "## Daily Log" not in result:
-                        result += "\n\n---\n\n## Daily Log\n\n<!-- 날짜별 엔트리가 여기 아래에 최신순으로 쌓입니다 -->\n"
-                    return result
-            except Exception as e:
-                print(f"[WARN] Claude CLI init failed ({e}), using empty template")
-        elif self.ai_backend == "anthropic_api":
-            try:
-                import anthropic
-                client = anthropic.Anthropic()
-                msg = client.messages.create(
-                    model="claude-sonnet-4-20250514", max_tokens=4096,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = self._clean_init_output(msg.content[0].text.strip())
-                if "## Daily Log" not in result:
-                    result += "\n\n---\n\n## Daily Log\n\n<!-- 날짜별 엔트리가 여기 아래에 최신순으로 쌓입니다 -->\n"
-                return result
-            except Exception as e:
-                print(f"[WARN] API init failed ({e}), using empty template")
-        elif self.ai_backend == "ollama":
-            try:
-                ollama_model = self.config.get("general", {}).get("ollama", {}).get("model", "llama3.1:8b")
-                payload = json.dumps({"model": ollama_model, "prompt": prompt, "stream": False})
-                req = urllib.request.Request(
-                    "http://localhost:11434/api/generate",
-                    data=payload.encode(), headers={"Content-Type": "application/json"}
-                )
-                with urllib.request.urlopen(req, timeout=None) as resp:
-                    result = self._clean_init_output(json.loads(resp.read().decode()).get("response", "").strip())
-                    if result and "## Daily Log" not in result:
-                        result += "\n\n---\n\n## Daily Log\n\n<!-- 날짜별 엔트리가 여기 아래에 최신순으로 쌓입니다 -->\n"
-                    if result:
-                        return result
-            except Exception:
-                pass
+        try:
+            result = self._clean_init_output(
+                self.backend.complete(prompt, timeout=self.ai_timeout, cache=self.response_cache))
+            # Ensure it has the Daily Log section
+            if "## Daily Log" not in result:
+                result += f"\n\n---\n\n## Daily Log\n\n{NoteWriter.PLACEHOLDER}\n"
+            return result
+        except AIGenerationError as e:
+            print(f"[WARN] AI init failed ({e}), using empty template")
 
         return base
 
@@ -1021,41 +2861,308 @@ class NoteGenerator:
 # ============================================================================
 
 class NoteWriter:
+    """Appends entries to RESEARCH_NOTE.md in O(entry), however long the note is.
+
+    Only a small tail window (trailing whitespace, the Daily Log placeholder) and
+    head window (the fixed-width `**Last Updated**` date, patched in place) are
+    read; the entries themselves are written at the end and fsync'd. A crash
+    can at worst leave a partial last entry, never a truncated note. The
+    placeholder is removed once, with an atomic rewrite, on the first append.
+    """
+    PLACEHOLDER = "<!-- 날짜별 엔트리가 여기 아래에 최신순으로 쌓입니다 -->"
+    LAST_UPDATED = re.compile(rb"\*\*Last Updated\*\*: (\d{4}-\d{2}-\d{2})")
+    HEAD_BYTES = 16384   # where the header (and its Last Updated field) lives
+    TAIL_BYTES = 65536   # where the Daily Log placeholder sits until the first entry
+
     @staticmethod
     def append_entry(note_path: Path, entry: str, date_override=None):
         """Append a daily entry at the bottom (chronological order)."""
+        NoteWriter.append_entries(note_path, [entry], date_override)
+
+    @staticmethod
+    def append_entries(note_path: Path, entries: list, date_override=None) -> Optional[dict]:
+        """Append entries (already in chronological order) with one write.
+
+        Returns {"before": [size, mtime_ns], "after": [size, mtime_ns],
+        "rewritten": bool, "spans": [[offset, length], ...]} (one span per
+        entry, for NoteIndex), or None if the note does not exist.
+        """
         note_path = Path(note_path)
         if not note_path.exists():
             print(f"[WARN] Note file not found: {note_path}")
-            return
-
-        content = note_path.read_text(encoding="utf-8")
-
-        # Remove placeholder comment on first entry
-        placeholder = "<!-- 날짜별 엔트리가 여기 아래에 최신순으로 쌓입니다 -->"
-        if placeholder in content:
-            content = content.replace(placeholder, "").strip()
+            return None
 
-        content = content.rstrip() + "\n" + entry + "\n"
+        st = note_path.stat()
+        before = [st.st_size, st.st_mtime_ns]
+        rewritten = NoteWriter.remove_placeholder(note_path)
 
+        block, spans = "", []
+        for entry in entries:
+            block = block.rstrip() + "\n"
+            start = len(block.encode("utf-8"))
+            spans.append([start, len(entry.rstrip().encode("utf-8"))])
+            block += entry + "\n"
         today = (date_override or datetime.date.today()).isoformat()
-        if "**Last Updated**:" in content:
-            import re
-            content = re.sub(
-                r'\*\*Last Updated\*\*: \d{4}-\d{2}-\d{2}',
-                f'**Last Updated**: {today}', content
-            )
 
-        note_path.write_text(content, encoding="utf-8")
-        print(f"[OK] Updated: {note_path}")
+        with open(note_path, "r+b") as f:
+            # Drop the note's trailing whitespace: overwrite it, then cut whatever is left
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 4096))
+            tail = f.read()
+            base = size - (len(tail) - len(tail.rstrip()))
+            f.seek(base)
+            f.write(block.encode("utf-8"))
+            f.truncate()
+
+            f.seek(0)
+            m = NoteWriter.LAST_UPDATED.search(f.read(NoteWriter.HEAD_BYTES))
+            if m and m.group(1) != today.encode("ascii"):
+                f.seek(m.start(1))
+                f.write(today.encode("ascii"))
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"[OK] Updated: {note_path}" + (f" ({len(entries)} entries)" if len(entries) > 1 else ""))
+        st = note_path.stat()
+        return {"before": before, "after": [st.st_size, st.st_mtime_ns], "rewritten": rewritten,
+                "spans": [[base + start, length] for start, length in spans]}
+
+    @staticmethod
+    def remove_placeholder(note_path: Path) -> bool:
+        """Drop the Daily Log placeholder comment (a no-op after the first entry).
+        Returns True if the note was rewritten."""
+        marker = NoteWriter.PLACEHOLDER.encode("utf-8")
+        with open(note_path, "rb") as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - NoteWriter.TAIL_BYTES))
+            if marker not in f.read():
+                return False
+        content = note_path.read_text(encoding="utf-8")
+        NoteWriter._write_atomic(note_path, content.replace(NoteWriter.PLACEHOLDER, "").strip() + "\n")
+        return True
 
     @staticmethod
     def create_initial(note_path: Path, content: str):
         note_path = Path(note_path)
         note_path.parent.mkdir(parents=True, exist_ok=True)
-        note_path.write_text(content, encoding="utf-8")
+        NoteWriter._write_atomic(note_path, content)
         print(f"[OK] Created: {note_path}")
 
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        """Write via a temp file + rename, so readers never see a partial note."""
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+class NoteIndex:
+    """Per-day segments of a project's note and where they sit in RESEARCH_NOTE.md.
+
+    The daily files written by DailyFileWriter are the segments; the cumulative
+    note is materialized from them by appending only the segments it does not
+    contain yet (`pending`), so a run that crashed between the two writes is
+    caught up by the next one. Rows (`note_index` table) are
+    {date: {"daily": path or None, "size", "mtime_ns", "sha256": of the daily file,
+    "summary", "summary_sha": cached digest and the sha256 it was made from,
+    "pending": bool, "spans": [[offset, length], ...] in the note}};
+    the `note_index_meta` doc holds the note's size/mtime when the spans were last
+    known good. Date-range reads seek straight to the spans; the note is only
+    re-parsed (once) when it was changed behind the index's back.
+    """
+    HEADING = re.compile(rb"^#\s+(\d{4}-\d{2}-\d{2})")
+    DAILY_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})-research-note\.md$")
+
+    def __init__(self, store: StateStore):
+        self.store = store
+
+    def reset(self, project: str, note_path: Path):
+        """A note was just (re)created: it holds no entries, so the index is exact."""
+        rows = self.store.load_rows(project, "note_index")
+        upserts = {d: dict(row, spans=[]) for d, row in rows.items() if row.get("daily")}
+        self.store.apply_rows(project, "note_index", upserts, [d for d in rows if d not in upserts])
+        st = Path(note_path).stat()
+        self.store.save_doc(project, "note_index_meta", {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                                         "stale": False})
+
+    def add_segment(self, project: str, date: datetime.date, daily_path: Path, text: str):
+        """Register a freshly written daily file (content `text`) as not yet in the note."""
+        row = self.store.load_rows(project, "note_index").get(date.isoformat()) or {"spans": []}
+        st = Path(daily_path).stat()
+        row.update(daily=str(daily_path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+                   sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(), pending=True)
+        self.store.apply_rows(project, "note_index", {date.isoformat(): row})
+
+    def daily_notes(self, project: str, daily_dir: Path, start: datetime.date, end: datetime.date,
+                    read: bool = False) -> list:
+        """Daily files of start..end, oldest first, as index rows plus `date`,
+        `path` and `text` (the content if it was read, else None).
+
+        Only indexed days are touched: one stat each, and a read only when
+        `read` is set or the file changed since it was indexed (so content is
+        read at most once per call). The daily dir itself is listed once, to
+        pick up files written before the index existed.
+        """
+        daily_dir = Path(daily_dir)
+        rows = self.store.load_rows(project, "note_index")
+        if (self.store.load_doc(project, "daily_index") or {}).get("dir") != str(daily_dir):
+            rows = self._scan_daily(project, daily_dir, rows)
+        out, upserts = [], {}
+        for d in sorted(k for k in rows if start.isoformat() <= k <= end.isoformat()):
+            row = rows[d]
+            if not row.get("daily"):
+                continue
+            path = Path(row["daily"])
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                upserts[d] = dict(row, daily=None, pending=False)
+                continue
+            text = None
+            if read or not row.get("sha256") or [row.get("size"), row.get("mtime_ns")] != [st.st_size, st.st_mtime_ns]:
+                text = path.read_text(encoding="utf-8")
+                sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                if [row.get("size"), row.get("mtime_ns"), row.get("sha256")] != [st.st_size, st.st_mtime_ns, sha]:
+                    row = upserts[d] = dict(row, size=st.st_size, mtime_ns=st.st_mtime_ns, sha256=sha)
+            out.append(dict(row, date=datetime.date.fromisoformat(d), path=path, text=text))
+        self.store.apply_rows(project, "note_index", upserts)
+        return out
+
+    def _scan_daily(self, project: str, daily_dir: Path, rows: dict) -> dict:
+        """Index the daily files already in daily_dir (already in the note, so not pending)."""
+        upserts = {}
+        if daily_dir.is_dir():
+            for e in os.scandir(daily_dir):
+                m = self.DAILY_NAME.match(e.name)
+                if m and rows.get(m.group(1), {}).get("daily") != e.path:
+                    upserts[m.group(1)] = dict(rows.get(m.group(1)) or {"spans": []},
+                                               daily=e.path, sha256=None, pending=False)
+        self.store.apply_rows(project, "note_index", upserts)
+        self.store.save_doc(project, "daily_index", {"dir": str(daily_dir)})
+        if upserts:
+            print(f"[INFO] Indexed {len(upserts)} daily file(s) in {daily_dir}")
+        return dict(rows, **upserts)
+
+    def set_summaries(self, project: str, summaries: dict):
+        """Cache digests: {date: (summary, sha256 of the daily file it summarizes,
+        or None for the file as last indexed)}."""
+        if not summaries:
+            return
+        rows = self.store.load_rows(project, "note_index")
+        upserts = {}
+        for d, (summary, sha) in summaries.items():
+            row = rows.get(d) or {"daily": None, "spans": []}
+            upserts[d] = dict(row, summary=summary, summary_sha=sha or row.get("sha256"))
+        self.store.apply_rows(project, "note_index", upserts)
+
+    def materialize(self, project: str, note_path: Path, date_override=None) -> int:
+        """Append every pending segment to the note (one write); returns how many."""
+        rows = self.store.load_rows(project, "note_index")
+        dates, entries = [], []
+        for date in sorted(d for d, row in rows.items() if row.get("pending")):
+            try:
+                entries.append(DailyFileWriter.read_entry(Path(rows[date]["daily"])))
+                dates.append(date)
+            except OSError as e:
+                print(f"[WARN] Daily segment {date} unreadable ({e}), skipped")
+                self.store.apply_rows(project, "note_index", {date: dict(rows[date], pending=False)})
+        if not entries:
+            return 0
+        if len(dates) > 1:
+            print(f"[INFO] Catching up {len(dates) - 1} segment(s) missing from {Path(note_path).name}")
+        result = NoteWriter.append_entries(note_path, entries, date_override)
+        if result:
+            self.record(project, note_path, dates, result, rows)
+        return len(entries)
+
+    def record(self, project: str, note_path: Path, dates: list, result: dict, rows: dict = None):
+        """Store the spans NoteWriter.append_entries reported for `dates`."""
+        meta = self.store.load_doc(project, "note_index_meta") or {}
+        rows = self.store.load_rows(project, "note_index") if rows is None else rows
+        # Spans stay trustworthy only if the note was exactly as last indexed (and
+        # the one-time placeholder rewrite did not move any indexed entry)
+        stale = (meta.get("stale", True) or [meta.get("size"), meta.get("mtime_ns")] != result["before"]
+                 or (result["rewritten"] and any(row.get("spans") for row in rows.values())))
+        upserts = {}
+        for date, span in zip(dates, result["spans"]):
+            row = upserts.get(date) or dict(rows.get(date) or {"daily": None, "spans": []})
+            row.update(pending=False, spans=list(row.get("spans", [])) + [span])
+            upserts[date] = row
+        self.store.apply_rows(project, "note_index", upserts)
+        size, mtime_ns = result["after"]
+        self.store.save_doc(project, "note_index_meta", {"size": size, "mtime_ns": mtime_ns, "stale": stale})
+
+    def _valid(self, project: str, note_path: Path) -> bool:
+        meta = self.store.load_doc(project, "note_index_meta") or {}
+        st = Path(note_path).stat()
+        return not meta.get("stale", True) and [meta.get("size"), meta.get("mtime_ns")] == [st.st_size, st.st_mtime_ns]
+
+    def rebuild(self, project: str, note_path: Path):
+        """Re-derive all spans from the note's `# YYYY-MM-DD` headings (one pass)."""
+        headings, log_start, offset = [], None, 0
+        with open(note_path, "rb") as f:
+            for line in f:
+                if log_start is None and line.startswith(b"## Daily Log"):
+                    log_start = offset
+                m = self.HEADING.match(line)
+                if m:
+                    headings.append((offset, m.group(1).decode("ascii")))
+                offset += len(line)
+        headings = [h for h in headings if log_start is None or h[0] > log_start]
+        spans = {}
+        for (start, date), (end, _) in zip(headings, headings[1:] + [(offset, None)]):
+            spans.setdefault(date, []).append([start, end - start])
+
+        rows = self.store.load_rows(project, "note_index")
+        upserts = {}
+        for date in set(rows) | set(spans):
+            row = dict(rows.get(date) or {"daily": None, "pending": False})
+            row["spans"] = spans.get(date, [])
+            upserts[date] = row
+        deletes = [d for d, row in upserts.items() if not row["spans"] and not row.get("daily")]
+        for d in deletes:
+            del upserts[d]
+        self.store.apply_rows(project, "note_index", upserts, deletes)
+        st = Path(note_path).stat()
+        self.store.save_doc(project, "note_index_meta", {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                                         "stale": False})
+        print(f"[INFO] Indexed {len(spans)} days in {Path(note_path).name}")
+
+    def rows(self, project: str, note_path: Path) -> dict:
+        """Index rows, with spans re-derived first if the note changed behind our back."""
+        if not self._valid(project, note_path):
+            self.rebuild(project, note_path)
+        return self.store.load_rows(project, "note_index")
+
+    def entries(self, project: str, note_path: Path, start: datetime.date, end: datetime.date) -> list:
+        """[(date, entry markdown)] for start..end (inclusive), read by offset."""
+        note_path = Path(note_path)
+        rows = self.rows(project, note_path)
+        out = []
+        with open(note_path, "rb") as f:
+            for date in sorted(d for d in rows if start.isoformat() <= d <= end.isoformat()):
+                row = rows[date]
+                if row.get("pending") and row.get("daily"):
+                    texts = [DailyFileWriter.read_entry(Path(row["daily"]))]
+                else:
+                    texts = []
+                    for offset, length in row.get("spans", []):
+                        f.seek(offset)
+                        texts.append(f.read(length).decode("utf-8", errors="replace"))
+                out += [(date, self._clean(t)) for t in texts]
+        return out
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        """Entry text without the surrounding `---` rules and blank lines."""
+        lines = text.strip().split("\n")
+        while lines and lines[0].strip() in ("", "---"):
+            lines.pop(0)
+        while lines and lines[-1].strip() in ("", "---"):
+            lines.pop()
+        return "\n".join(lines)
+
 
 # ============================================================================
 # Daily File Writer
@@ -1063,8 +3170,9 @@ class NoteWriter:
 
 class DailyFileWriter:
     @staticmethod
-    def write(daily_dir: Path, project_name: str, date: datetime.date, entry: str) -> Path:
-        """Write a standalone daily note file."""
+    def write(daily_dir: Path, project_name: str, date: datetime.date, entry: str,
+              index: "NoteIndex" = None) -> Path:
+        """Write a standalone daily note file (and register it in `index`)."""
         daily_dir = Path(daily_dir)
         daily_dir.mkdir(parents=True, exist_ok=True)
 
@@ -1077,55 +3185,153 @@ class DailyFileWriter:
                   f"> **Project**: {project_name}\n\n")
 
         filepath.write_text(header + entry, encoding="utf-8")
+        if index:
+            index.add_segment(project_name, date, filepath, header + entry)
         print(f"[OK] Daily file: {filepath}")
         return filepath
 
+    @staticmethod
+    def read_entry(filepath: Path) -> str:
+        """The entry part of a daily file (without the header write() adds)."""
+        text = Path(filepath).read_text(encoding="utf-8")
+        head, sep, entry = text.partition("\n\n")
+        return entry if sep and head.startswith("# ") else text
+
 
 # ============================================================================
 # Weekly Merger
 # ============================================================================
 
+class DailyDigests:
+    """Compact per-day summaries: the map step of weekly/monthly/quarterly reports.
+
+    A digest is produced once, when the daily file is written, and cached in
+    the daily-note index (NoteIndex rows: `summary` plus the `summary_sha` of
+    the file content it was made from). It is reused while the file's content
+    hash is unchanged, so reports read a few KB of digests instead of every
+    daily file. report.digest selects how: "extract" keeps the entry's own
+    summary sections (no AI call), "ai" asks the backend for a short summary.
+    """
+    SECTIONS = ("Changes Summary", "Issues & Solutions", "Lessons Learned")
+
+    def __init__(self, config: dict, store: "StateStore" = None, backend: "AIBackend" = None,
+                 cache: Optional[ContentCache] = None):
+        report = config.get("report", {})
+        self.mode = report.get("digest", "extract")
+        self.max_chars = int(report.get("digest_max_chars", 1200))
+        self.index = NoteIndex(store) if store else None
+        self.backend = backend
+        self.cache = cache
+        self.ai_timeout = config.get("general", {}).get("ai_timeout_sec", 900) or None
+
+    def update(self, project: str, date: datetime.date, path: Path, entry: str = None) -> str:
+        """(Re)build the digest for one daily file; entry avoids re-reading it."""
+        summary = self._summarize(entry if entry is not None else Path(path).read_text(encoding="utf-8"))
+        if self.index:
+            self.index.set_summaries(project, {date.isoformat(): (summary, None)})
+        return summary
+
+    def collect(self, project: str, notes: list) -> list:
+        """[(date, digest)] for NoteIndex.daily_notes() rows, building only
+        missing or stale digests (from the row's text when it was already read)."""
+        out, fresh = [], {}
+        for note in notes:
+            if note.get("summary") is not None and note.get("sha256") \
+                    and note.get("summary_sha") == note["sha256"]:
+                out.append((note["date"], note["summary"]))
+                continue
+            text = note["text"] if note["text"] is not None else note["path"].read_text(encoding="utf-8")
+            summary = self._summarize(text)
+            fresh[note["date"].isoformat()] = (summary, hashlib.sha256(text.encode("utf-8")).hexdigest())
+            out.append((note["date"], summary))
+        if self.index:
+            self.index.set_summaries(project, fresh)
+        return out
+
+    def _summarize(self, text: str) -> str:
+        if self.mode == "ai" and self.backend:
+            prompt = ("다음 일일 연구노트를 3~5개의 한국어 bullet로 압축 요약하세요. "
+                      "핵심 변경, 해결한 이슈, 수치/결과, 교훈만 포함하고 서문 없이 bullet만 출력하세요.\n\n"
+                      + text)
+            try:
+                return self.backend.complete(prompt, max_tokens=512, timeout=self.ai_timeout,
+                                             cache=self.cache).strip()[:self.max_chars]
+            except AIGenerationError as e:
+                print(f"[WARN] AI digest failed ({e}), extracting sections instead")
+        return self.extract(text, self.max_chars)
+
+    @classmethod
+    def extract(cls, text: str, max_chars: int = 1200) -> str:
+        """The entry's summary sections (see SECTIONS), each capped to an equal share."""
+        sections, current = {}, None
+        for line in text.split("\n"):
+            m = re.match(r"^##\s+(.+)", line)
+            if m:
+                current = m.group(1).strip()
+                sections[current] = []
+            elif current and line.strip() and line.strip() != "---":
+                sections[current].append(line.rstrip())
+        share = max_chars // len(cls.SECTIONS)
+        picked = []
+        for name in cls.SECTIONS:
+            body = next((lines for title, lines in sections.items() if title.startswith(name)), None)
+            if body:
+                picked.append(f"{name}:\n" + "\n".join(body)[:share])
+        if picked:
+            return "\n".join(picked)
+        body = [l for l in text.split("\n") if l.strip() and not l.startswith(">") and l.strip() != "---"]
+        return "\n".join(body)[:max_chars]
+
+
 class WeeklyMerger:
-    def __init__(self, config: dict):
+    """Weekly, monthly, quarterly and custom-range reports. Daily files are
+    looked up through the daily-note index (NoteIndex) instead of probing one
+    path per day, and the AI summary is a map-reduce over the cached daily
+    digests (see DailyDigests) rather than the raw daily files."""
+    PERIOD_WORDS = {"monthly": "month", "quarterly": "quarter"}
+
+    def __init__(self, config: dict, state_dir: Path = None, use_cache: bool = True,
+                 store: "StateStore" = None):
         self.config = config
-        ollama_cfg = config.get("general", {}).get("ollama", {})
-        configured = config.get("general", {}).get("ai_backend", "auto")
-        self.ai_backend = AIBackendDetector.resolve(configured, ollama_cfg.get("model", "llama3.1:8b"))
-
-    def merge(self, daily_dir: Path, project_name: str, date: datetime.date) -> Optional[Path]:
-        """Merge last 7 daily files into a weekly report."""
+        store = store or StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+        self.backend = AIRouter.get(config, state_dir, store)
+        self.ai_timeout = config.get("general", {}).get("ai_timeout_sec", 900) or None
+        self.response_cache = open_response_cache(config, state_dir, use_cache)
+        self.index = NoteIndex(store)
+        self.digests = DailyDigests(config, store, self.backend, self.response_cache)
+        # AI summary on top of the report (report.ai_summary, else notification.weekly.ai_summary);
+        # off, reports are built from the files/digests alone and no backend is touched
+        weekly_ai = config.get("notification", {}).get("weekly", {}).get("ai_summary", False)
+        self.ai_summary = config.get("report", {}).get("ai_summary", weekly_ai)
+
+    def merge(self, daily_dir: Path, project_name: str, date: datetime.date,
+              start: datetime.date = None) -> Optional[Path]:
+        """Merge the daily files of start..date (default: last 7 days) into a
+        weekly report. Each file is read once, for both the digest and the body."""
         daily_dir = Path(daily_dir)
         if not daily_dir.exists():
             print(f"[WARN] Daily dir not found: {daily_dir}")
             return None
 
-        daily_files = []
-        for i in range(7):
-            d = date - datetime.timedelta(days=i)
-            fp = daily_dir / f"{d.isoformat()}-research-note.md"
-            if fp.exists():
-                daily_files.append((d, fp))
-
-        if not daily_files:
+        notes = self.index.daily_notes(project_name, daily_dir,
+                                       start or date - datetime.timedelta(days=6), date, read=True)
+        if not notes:
             print(f"[SKIP] No daily files found for weekly merge")
             return None
 
-        daily_files.sort(key=lambda x: x[0])  # Chronological
-
-        week_start = daily_files[0][0]
-        week_end = daily_files[-1][0]
+        week_start = notes[0]["date"]
+        week_end = notes[-1]["date"]
 
         parts = []
         parts.append(f"# Weekly Research Report: {project_name}")
         parts.append(f"> **Period**: {week_start.isoformat()} ~ {week_end.isoformat()}")
-        parts.append(f"> **Daily Notes**: {len(daily_files)} days")
+        parts.append(f"> **Daily Notes**: {len(notes)} days")
         parts.append(f"> **Generated**: {date.isoformat()}\n")
 
         # AI Summary
-        use_ai = self.config.get("notification", {}).get("weekly", {}).get("ai_summary", False)
-        if use_ai:
-            all_content = "\n".join(fp.read_text(encoding="utf-8") for _, fp in daily_files)
-            summary = self._generate_summary(all_content, project_name, week_start, week_end)
+        if self.ai_summary:
+            summary = self._generate_summary(self.digests.collect(project_name, notes),
+                                             project_name, week_start, week_end, "week")
             if summary:
                 parts.append("---\n")
                 parts.append("## Weekly Summary (AI Generated)\n")
@@ -1135,9 +3341,8 @@ class WeeklyMerger:
         parts.append("---\n")
         parts.append("## Daily Notes\n")
 
-        for d, fp in daily_files:
-            content = fp.read_text(encoding="utf-8")
-            parts.append(content)
+        for note in notes:
+            parts.append(note["text"])
             parts.append("")
 
         weekly_filename = f"{week_start.isoformat()}_to_{week_end.isoformat()}-weekly-report.md"
@@ -1146,82 +3351,336 @@ class WeeklyMerger:
         print(f"[OK] Weekly report: {weekly_path}")
         return weekly_path
 
-    def _generate_summary(self, content: str, project: str, start, end) -> Optional[str]:
-        prompt = (f"Summarize this week's research progress for project '{project}' "
-                  f"({start} ~ {end}). Write in Korean, bullet points, concise.\n\n"
-                  f"Focus on: key changes, issues resolved, metrics improvements, "
-                  f"lessons learned.\n\n{content[:8000]}")
+    def merge_monthly(self, daily_dir: Path, project_name: str, date: datetime.date) -> Optional[Path]:
+        """Monthly report for the calendar month of `date` (the previous month
+        when run on the 1st)."""
+        if date.day == 1:
+            date = date - datetime.timedelta(days=1)
+        first = date.replace(day=1)
+        return self.merge_period(daily_dir, project_name, first, date, "monthly", first.strftime("%Y-%m"))
+
+    def merge_quarterly(self, daily_dir: Path, project_name: str, date: datetime.date) -> Optional[Path]:
+        """Quarterly report for the quarter of `date` (the previous quarter
+        when run on its first day)."""
+        if date.day == 1 and date.month % 3 == 1:
+            date = date - datetime.timedelta(days=1)
+        quarter = (date.month - 1) // 3 + 1
+        first = datetime.date(date.year, 3 * quarter - 2, 1)
+        return self.merge_period(daily_dir, project_name, first, date, "quarterly", f"{date.year}-Q{quarter}")
+
+    def merge_period(self, daily_dir: Path, project_name: str, start: datetime.date,
+                     end: datetime.date, kind: str = "period", label: str = None) -> Optional[Path]:
+        """Report over start..end listing per-day digests instead of full notes.
+        Saved as `{label}-{kind}-report.md` (label defaults to `{start}_to_{end}`)."""
+        daily_dir = Path(daily_dir)
+        if not daily_dir.exists():
+            print(f"[WARN] Daily dir not found: {daily_dir}")
+            return None
+        label = label or f"{start.isoformat()}_to_{end.isoformat()}"
+        notes = self.index.daily_notes(project_name, daily_dir, start, end)
+        if not notes:
+            print(f"[SKIP] No daily files found for {label}")
+            return None
 
-        if self.ai_backend == "claude_cli":
-            try:
-                r = subprocess.run(
-                    ["claude", "--print", "-p", prompt],
-                    capture_output=True, text=True, timeout=120
-                )
-                if r.returncode == 0:
-                    return r.stdout.strip()
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                pass
-        elif self.ai_backend == "anthropic_api":
-            try:
-                import anthropic
-                api_key = os.environ.get("ANTHROPIC_API_KEY")
-                if api_key:
-                    client = anthropic.Anthropic(api_key=api_key)
-                    msg = client.messages.create(
-                        model="claude-sonnet-4-5-20250929", max_tokens=2048,
-                        messages=[{"role": "user", "content": prompt}]
-                    )
-                    return msg.content[0].text
-            except Exception:
-                pass
-        elif self.ai_backend == "ollama":
-            try:
-                ollama_model = self.config.get("general", {}).get("ollama", {}).get("model", "llama3.1:8b")
-                data = json.dumps({
-                    "model": ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {"temperature": 0.3, "num_predict": 2048},
-                }).encode("utf-8")
-                req = urllib.request.Request(
-                    "http://localhost:11434/api/generate",
-                    data=data,
-                    headers={"Content-Type": "application/json"},
-                )
-                with urllib.request.urlopen(req, timeout=180) as resp:
-                    result = json.loads(resp.read().decode())
-                text = result.get("response", "").strip()
-                if text:
-                    return text
-            except Exception:
-                pass
+        title = kind.capitalize()
+        digests = self.digests.collect(project_name, notes)
+        parts = [f"# {title} Research Report: {project_name}",
+                 f"> **Period**: {notes[0]['date'].isoformat()} ~ {notes[-1]['date'].isoformat()}",
+                 f"> **Daily Notes**: {len(notes)} days",
+                 f"> **Generated**: {get_date(self.config).isoformat()}\n"]
+        summary = None
+        if self.ai_summary:
+            summary = self._generate_summary(digests, project_name, notes[0]["date"], notes[-1]["date"],
+                                             self.PERIOD_WORDS.get(kind, "period"))
+        if summary:
+            parts += ["---\n", f"## {title} Summary (AI Generated)\n", summary, ""]
+        parts += ["---\n", "## Daily Digests\n"]
+        for note, (d, digest) in zip(notes, digests):
+            parts += [f"### {d.isoformat()} ([{note['path'].name}]({note['path'].name}))\n", digest, ""]
+
+        report_path = daily_dir / f"{label}-{kind}-report.md"
+        report_path.write_text("\n".join(parts), encoding="utf-8")
+        print(f"[OK] {title} report: {report_path}")
+        return report_path
+
+    def _generate_summary(self, digests: list, project: str, start, end, period: str = "week") -> Optional[str]:
+        """Reduce [(date, digest)] to one summary. Digests that do not fit the
+        backend's context budget are first summarized in groups, recursively."""
+        blocks = [f"[{d.isoformat()}]\n{text}" for d, text in digests]
+        budget = self.backend.context_tokens
+        for _ in range(3):
+            if len(blocks) <= 1 or estimate_tokens("\n\n".join(blocks)) <= budget:
+                break
+            groups, current, used = [], [], 0
+            for block in blocks:
+                cost = estimate_tokens(block)
+                if current and used + cost > budget:
+                    groups.append(current)
+                    current, used = [], 0
+                current.append(block)
+                used += cost
+            groups.append(current)
+            if len(groups) == len(blocks):
+                break  # every block alone is over budget; truncate below instead
+            print(f"  [AI] Reducing {len(blocks)} digests in {len(groups)} groups")
+            blocks = [self._summarize(
+                f"Condense these research-note digests for project '{project}' into Korean bullet "
+                f"points, keeping dates, key changes, resolved issues and metrics.", "\n\n".join(g))
+                or truncate_tokens("\n\n".join(g), budget // 2) for g in groups]
+        content = truncate_tokens("\n\n".join(blocks), budget)
+        return self._summarize(
+            f"Summarize this {period}'s research progress for project '{project}' "
+            f"({start} ~ {end}). Write in Korean, bullet points, concise.\n\n"
+            f"Focus on: key changes, issues resolved, metrics improvements, "
+            f"lessons learned.", content)
+
+    def _summarize(self, instruction: str, content: str) -> Optional[str]:
+        try:
+            return self.backend.complete(f"{instruction}\n\n{content}", max_tokens=2048,
+                                         timeout=self.ai_timeout, cache=self.response_cache).strip()
+        except AIGenerationError as e:
+            print(f"[WARN] Summary generation failed: {e}")
+        return None
+
+
+# ============================================================================
+# Search Index
+# ============================================================================
+
+class SearchIndex:
+    """Full-text index of the notes (`search.db`, SQLite FTS5) for --search.
+
+    Documents are `## ` sections: those of every day's entry (from its daily
+    file, or from the note for days that only exist there, e.g. backfill) and
+    those of RESEARCH_NOTE.md before `## Daily Log` (date NULL). `sources`
+    holds the content hash each day / note head was indexed from, so sync()
+    only re-reads what changed; the daily write path indexes its entry
+    directly. The trigram tokenizer (SQLite 3.34+) is used when available so
+    that Korean words match inside longer words, as `grep` would.
+
+    Kept outside the StateStore on purpose: it needs an SQLite FTS5 virtual
+    table whatever state.backend is, and holds only derived data that sync()
+    can rebuild from the notes, so deleting it loses nothing.
+    """
+
+    def __init__(self, db_path: Path):
+        import sqlite3
+        self.conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sources (project TEXT, key TEXT, sha TEXT, "
+                          "PRIMARY KEY (project, key)) WITHOUT ROWID")
+        exists = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'sections'").fetchone()
+        if not exists:
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    self.conn.execute(
+                        "CREATE VIRTUAL TABLE sections USING fts5(heading, body, project UNINDEXED, "
+                        f"key UNINDEXED, path UNINDEXED, tokenize = '{tokenizer}')")
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            else:
+                raise sqlite3.OperationalError("no usable FTS5 tokenizer")
+        self.trigram = "trigram" in (exists or self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'sections'").fetchone())[0]
+        self.conn.commit()
+
+    @staticmethod
+    def open(state_dir: Path) -> Optional["SearchIndex"]:
+        """The index in state_dir, or None (with a warning) without sqlite3/FTS5."""
+        try:
+            return SearchIndex(Path(state_dir) / "search.db")
+        except ImportError:
+            print("[WARN] sqlite3 모듈을 사용할 수 없어 검색 인덱스를 건너뜁니다")
+        except Exception as e:
+            print(f"[WARN] Search index unavailable (SQLite FTS5 required): {e}")
         return None
 
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def sections(text: str) -> list:
+        """[(heading, body)] split at `## ` headings; text before the first one
+        is kept under the `# ` title it starts with (or "")."""
+        out, heading, lines = [], "", []
+        for line in text.split("\n"):
+            m = re.match(r"^##\s+(.+)", line)
+            if m and not line.startswith("###"):
+                out.append((heading, lines))
+                heading, lines = m.group(1).strip(), []
+            elif not out and not heading and line.startswith("# "):
+                heading = line[2:].strip()
+            else:
+                lines.append(line)
+        out.append((heading, lines))
+        return [(h, "\n".join(l).strip()) for h, l in out
+                if "\n".join(l).strip() not in ("", "---")]
+
+    def add(self, project: str, key: str, path: Path, text: str, sha: str = None, replace: bool = True):
+        """(Re)index one day's entry (key = YYYY-MM-DD) or the note head (key = "note").
+        replace=False skips deleting old sections (a scan) for keys never indexed."""
+        sha = sha or hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM sections WHERE project = ? AND key = ?", (project, key))
+            self.conn.executemany(
+                "INSERT INTO sections (heading, body, project, key, path) VALUES (?, ?, ?, ?, ?)",
+                ((h, b, project, key, str(path)) for h, b in self.sections(text)))
+            self.conn.execute("INSERT OR REPLACE INTO sources (project, key, sha) VALUES (?, ?, ?)",
+                              (project, key, sha))
+
+    def remove(self, project: str, keys: list):
+        if not keys:
+            return
+        with self._lock, self.conn:
+            marks = ", ".join("?" * len(keys))
+            self.conn.execute(f"DELETE FROM sections WHERE project = ? AND key IN ({marks})", [project] + keys)
+            self.conn.execute(f"DELETE FROM sources WHERE project = ? AND key IN ({marks})", [project] + keys)
+
+    def add_note_head(self, project: str, note_path: Path, known: dict = None):
+        """Index the note's sections before `## Daily Log` if they changed
+        (the log itself is indexed per day). Reads only up to that heading."""
+        lines = []
+        try:
+            with open(note_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if line.startswith("## Daily Log"):
+                        break
+                    lines.append(line)
+        except FileNotFoundError:
+            return
+        text = "".join(lines)
+        sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if known is None:
+            known = self._known(project)
+        if known.get("note") != sha:
+            self.add(project, "note", note_path, text, sha)
+
+    def _known(self, project: str) -> dict:
+        with self._lock:
+            return dict(self.conn.execute("SELECT key, sha FROM sources WHERE project = ?", (project,)))
+
+    def sync(self, project: str, note_index: "NoteIndex", note_path: Path, daily_dir: Path) -> int:
+        """Bring the project's documents up to date; returns how many were re-indexed.
+        Daily files are stat'ed through the note index and read only if changed."""
+        known = self._known(project)
+        note_path = Path(note_path)
+        seen, changed = {"note"}, 0
+        for note in note_index.daily_notes(project, daily_dir, datetime.date.min, datetime.date.max):
+            key = note["date"].isoformat()
+            seen.add(key)
+            if known.get(key) != note["sha256"]:
+                text = note["text"] if note["text"] is not None else note["path"].read_text(encoding="utf-8")
+                self.add(project, key, note["path"], text, note["sha256"], replace=key in known)
+                changed += 1
+        if note_path.exists():
+            # Days that exist only in the note (history backfill): keyed by their spans
+            rows = note_index.rows(project, note_path)
+            with open(note_path, "rb") as f:
+                for key, row in sorted(rows.items()):
+                    if key in seen or not row.get("spans"):
+                        continue
+                    seen.add(key)
+                    sig = "spans:" + json.dumps(row["spans"])
+                    if known.get(key) != sig:
+                        texts = []
+                        for offset, length in row["spans"]:
+                            f.seek(offset)
+                            texts.append(f.read(length).decode("utf-8", errors="replace"))
+                        self.add(project, key, note_path, "\n\n".join(texts), sig, replace=key in known)
+                        changed += 1
+            self.add_note_head(project, note_path, known)
+        self.remove(project, [k for k in known if k not in seen])
+        return changed
+
+    def search(self, query: str, projects: list = None, start: datetime.date = None,
+               end: datetime.date = None, section: str = None, limit: int = 20) -> tuple:
+        """(total, [hit dicts]) for the sections containing every word of query,
+        oldest first (note-head sections last). Words are matched literally."""
+        terms = query.split()
+        if not terms:
+            return 0, []
+        fts = [t for t in terms if not self.trigram or len(t) >= 3]
+        where, params = [], []
+        if fts:
+            where.append("sections MATCH ?")
+            params.append(" ".join('"' + t.replace('"', '""') + '"' for t in fts))
+        for t in terms:
+            if t not in fts:  # too short for a trigram: filter instead
+                where.append("(heading || ' ' || body) LIKE ? ESCAPE '\\'")
+                params.append("%" + re.sub(r"([\\%_])", r"\\\1", t) + "%")
+        if projects:
+            where.append(f"project IN ({', '.join('?' * len(projects))})")
+            params += projects
+        if start or end:  # dated sections only
+            where.append("key BETWEEN ? AND ?")
+            params += [(start or datetime.date.min).isoformat(), (end or datetime.date.max).isoformat()]
+        if section:
+            where.append("heading LIKE ?")
+            params.append(section + "%")
+        cond = " AND ".join(where)
+        snippet = "snippet(sections, 1, '[', ']', '…', 16)" if fts else "substr(body, 1, 160)"
+        with self._lock:
+            total = self.conn.execute(f"SELECT count(*) FROM sections WHERE {cond}", params).fetchone()[0]
+            cur = self.conn.execute(
+                f"SELECT project, key, heading, path, {snippet} FROM sections WHERE {cond} "
+                f"ORDER BY key = 'note', key, project LIMIT ?", params + [limit])
+            hits = [{"project": p, "date": k, "heading": h, "path": path,
+                     "snippet": " ".join(snip.split())} for p, k, h, path, snip in cur]
+        return total, hits
+
 
 # ============================================================================
 # Notification Manager
 # ============================================================================
 
 class NotificationManager:
-    def __init__(self, config: dict):
+    """Collects a run's notifications (queue) and delivers them in one stage
+    (flush): email over a single authenticated SMTP session, Slack DMs over
+    keep-alive connections with recipients in parallel, both channels at once."""
+    SLACK_WORKERS = 4
+
+    def __init__(self, config: dict, state_dir: Path = None, store: StateStore = None):
         self.config = config
         self.notif = config.get("notification", {})
         self.enabled = self.notif.get("enabled", False)
-
-    def send(self, subject: str, body: str, attachment_path: Path = None):
-        """Send notification via all enabled channels."""
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.store = store
+        self.outbox = []
+        self._lock = threading.Lock()
+
+    def queue(self, subject: str, body: str, attachment_path: Path = None):
+        """Add a notification to this run's outbox (sent by flush())."""
+        with self._lock:
+            self.outbox.append({"subject": subject, "body": body, "attachment_path": attachment_path})
+
+    def flush(self):
+        """Send everything queued via all enabled channels."""
+        with self._lock:
+            messages, self.outbox = self.outbox, []
+        if not messages:
+            return
         if not self.enabled:
             print("[SKIP] Notifications disabled")
             return
 
+        channels = []
         if self.notif.get("email", {}).get("enabled", False):
-            self._send_email(subject, body, attachment_path)
-
+            channels.append(self._send_email)
         if self.notif.get("slack", {}).get("enabled", False):
-            self._send_slack(subject, body, attachment_path)
-
-    def _send_email(self, subject: str, body: str, attachment_path: Path = None):
+            channels.append(self._send_slack)
+        if len(channels) == 1:
+            channels[0](messages)
+        elif channels:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=len(channels)) as ex:
+                list(ex.map(lambda send: send(messages), channels))
+
+    def _send_email(self, messages: list):
         email_cfg = self.notif["email"]
         sender = os.environ.get(email_cfg.get("sender_env", ""), "")
         password = os.environ.get(email_cfg.get("password_env", ""), "")
@@ -1235,14 +3694,19 @@ class NotificationManager:
             print("[WARN] No email recipients configured")
             return
 
-        try:
+        import email.mime.multipart
+        import email.mime.text
+        import smtplib
+
+        def build(m: dict) -> str:
             msg = email.mime.multipart.MIMEMultipart()
             msg["From"] = sender
             msg["To"] = ", ".join(recipients)
-            msg["Subject"] = subject
+            msg["Subject"] = m["subject"]
 
-            msg.attach(email.mime.text.MIMEText(body, "plain", "utf-8"))
+            msg.attach(email.mime.text.MIMEText(m["body"], "plain", "utf-8"))
 
+            attachment_path = m["attachment_path"]
             if attachment_path and Path(attachment_path).exists():
                 with open(attachment_path, "r", encoding="utf-8") as f:
                     att = email.mime.text.MIMEText(f.read(), "plain", "utf-8")
@@ -1251,21 +3715,27 @@ class NotificationManager:
                     filename=Path(attachment_path).name
                 )
                 msg.attach(att)
+            return msg.as_string()
 
-            smtp_host = email_cfg.get("smtp_host", "smtp.gmail.com")
-            smtp_port = email_cfg.get("smtp_port", 587)
-
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
+        smtp_host = email_cfg.get("smtp_host", "smtp.gmail.com")
+        smtp_port = email_cfg.get("smtp_port", 587)
+        try:
+            # One connection, STARTTLS and login for the whole run
+            with smtplib.SMTP(smtp_host, smtp_port, timeout=60) as server:
                 if email_cfg.get("use_tls", True):
                     server.starttls()
                 server.login(sender, password)
-                server.sendmail(sender, recipients, msg.as_string())
-
-            print(f"[OK] Email sent to: {', '.join(recipients)}")
+                for m in messages:
+                    try:
+                        server.sendmail(sender, recipients, build(m))
+                        print(f"[OK] Email sent to: {', '.join(recipients)} ({m['subject']})")
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                        # Rejected message only (sendmail resets the transaction); keep the session
+                        print(f"[ERROR] Email failed ({m['subject']}): {e}")
         except Exception as e:
             print(f"[ERROR] Email failed: {e}")
 
-    def _send_slack(self, subject: str, body: str, attachment_path: Path = None):
+    def _send_slack(self, messages: list):
         slack_cfg = self.notif["slack"]
         token = os.environ.get(slack_cfg.get("bot_token_env", ""), "")
         recipients = slack_cfg.get("recipients", [])
@@ -1277,82 +3747,150 @@ class NotificationManager:
             print("[WARN] No Slack recipients configured")
             return
 
-        message = f"*{subject}*\n\n```\n{body[:35000]}\n```"
-
-        for user_id in recipients:
-            try:
-                # Open DM channel
-                dm_data = json.dumps({"users": user_id}).encode("utf-8")
-                req = urllib.request.Request(
-                    "https://slack.com/api/conversations.open",
-                    data=dm_data,
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Content-Type": "application/json",
-                    },
-                )
-                with urllib.request.urlopen(req, timeout=10) as resp:
-                    dm_resp = json.loads(resp.read().decode())
+        if self.store is None and self.state_dir:
+            self.store = StateStore.open(self.state_dir, self.config.get("state", {}).get("backend", "sqlite"))
+        client = SlackClient(token, slack_cfg.get("api_url", SlackClient.API_URL), self.store)
 
-                if not dm_resp.get("ok"):
-                    print(f"[ERROR] Slack DM open failed for {user_id}: {dm_resp.get('error')}")
-                    continue
+        def send_all(user_id: str):
+            # One recipient's messages go out in order on this worker's connection
+            for m in messages:
+                try:
+                    client.send_dm(user_id, f"*{m['subject']}*\n\n```\n{m['body'][:35000]}\n```",
+                                   m["attachment_path"])
+                except Exception as e:  # one recipient's failure must not drop the rest of the outbox
+                    print(f"[ERROR] Slack failed for {user_id}: {e}")
 
-                channel_id = dm_resp["channel"]["id"]
-
-                # Send message
-                msg_data = json.dumps({
-                    "channel": channel_id,
-                    "text": message,
-                }).encode("utf-8")
-                req = urllib.request.Request(
-                    "https://slack.com/api/chat.postMessage",
-                    data=msg_data,
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Content-Type": "application/json",
-                    },
-                )
-                with urllib.request.urlopen(req, timeout=10) as resp:
-                    msg_resp = json.loads(resp.read().decode())
+        if len(recipients) == 1:
+            send_all(recipients[0])
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(self.SLACK_WORKERS, len(recipients))) as ex:
+                list(ex.map(send_all, recipients))
+        client.close()
+
+
+class SlackClient:
+    """Slack Web API calls over keep-alive HTTP connections (one per thread).
+
+    DM channel IDs from conversations.open are cached in the state store's
+    shared `slack_channels` doc (per bot token), so a run only opens channels
+    for new recipients.
+    """
+    API_URL = "https://slack.com/api"
+
+    def __init__(self, token: str, api_url: str = API_URL, store: StateStore = None):
+        import urllib.parse
+        self.token = token
+        u = urllib.parse.urlsplit(api_url)
+        self.tls, self.host, self.port = u.scheme == "https", u.hostname, u.port
+        self.base = u.path.rstrip("/")
+        self.store = store
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+        self.token_id = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        self.channels = {}
+        if store:
+            try:
+                cached = store.load_doc(StateStore.SHARED, "slack_channels") or {}
+                if cached.get("token") == self.token_id:
+                    self.channels = cached.get("channels", {})
+            except Exception as e:
+                print(f"[WARN] Ignoring unreadable Slack channel cache: {e}")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import http.client
+            cls = http.client.HTTPSConnection if self.tls else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=30)
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def call(self, method: str, payload: dict, timeout: float = 10) -> dict:
+        """POST a Web API method; retried once on a dropped keep-alive
+        connection and after Retry-After on HTTP 429."""
+        import http.client
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Authorization": f"Bearer {self.token}",
+                   "Content-Type": "application/json; charset=utf-8"}
+        for attempt in range(3):
+            conn = self._conn()
+            conn.timeout = timeout
+            if conn.sock:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request("POST", f"{self.base}/{method}", body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()  # server closed an idle connection; reconnects on next request
+                if attempt:
+                    raise
+                continue
+            if resp.status == 429 and attempt < 2:
+                time.sleep(min(float(resp.getheader("Retry-After") or 1), 30))
+                continue
+            if resp.status >= 400:
+                raise OSError(f"HTTP {resp.status}: {data[:200]!r}")
+            return json.loads(data.decode("utf-8") or "{}")
+        raise OSError(f"Slack {method}: rate limited")
+
+    def channel(self, user_id: str, refresh: bool = False) -> Optional[str]:
+        """DM channel ID for user_id (cached)."""
+        if not refresh and user_id in self.channels:
+            return self.channels[user_id]
+        r = self.call("conversations.open", {"users": user_id})
+        if not r.get("ok"):
+            print(f"[ERROR] Slack DM open failed for {user_id}: {r.get('error')}")
+            return None
+        with self._lock:
+            self.channels[user_id] = r["channel"]["id"]
+            self._save()
+        return r["channel"]["id"]
+
+    def send_dm(self, user_id: str, text: str, attachment_path: Path = None):
+        channel_id = self.channel(user_id)
+        if not channel_id:
+            return
+        r = self.call("chat.postMessage", {"channel": channel_id, "text": text})
+        if r.get("error") in ("channel_not_found", "is_archived"):
+            channel_id = self.channel(user_id, refresh=True)  # cached DM channel went away
+            if not channel_id:
+                return
+            r = self.call("chat.postMessage", {"channel": channel_id, "text": text})
+        if r.get("ok"):
+            print(f"[OK] Slack DM sent to: {user_id}")
+        else:
+            print(f"[ERROR] Slack send failed: {r.get('error')}")
 
-                if msg_resp.get("ok"):
-                    print(f"[OK] Slack DM sent to: {user_id}")
+        # Upload file if attachment
+        if attachment_path and Path(attachment_path).exists():
+            try:
+                r = self.call("files.upload", {
+                    "channels": channel_id,
+                    "content": Path(attachment_path).read_text(encoding="utf-8"),
+                    "filename": Path(attachment_path).name,
+                    "title": f"Research Note - {Path(attachment_path).stem}",
+                }, timeout=30)
+                if r.get("ok"):
+                    print(f"[OK] Slack file uploaded: {Path(attachment_path).name}")
                 else:
-                    print(f"[ERROR] Slack send failed: {msg_resp.get('error')}")
-
-                # Upload file if attachment
-                if attachment_path and Path(attachment_path).exists():
-                    self._slack_upload_file(token, channel_id, attachment_path)
+                    print(f"[WARN] Slack upload failed: {r.get('error')}")
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Slack upload error: {e}")
 
-            except (urllib.error.URLError, Exception) as e:
-                print(f"[ERROR] Slack failed for {user_id}: {e}")
+    def _save(self):
+        if self.store:
+            self.store.save_doc(StateStore.SHARED, "slack_channels",
+                                {"token": self.token_id, "channels": self.channels})
 
-    def _slack_upload_file(self, token: str, channel_id: str, filepath: Path):
-        try:
-            content = Path(filepath).read_text(encoding="utf-8")
-            data = json.dumps({
-                "channels": channel_id,
-                "content": content,
-                "filename": Path(filepath).name,
-                "title": f"Research Note - {Path(filepath).stem}",
-            }).encode("utf-8")
-            req = urllib.request.Request(
-                "https://slack.com/api/files.upload",
-                data=data,
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                },
-            )
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                r = json.loads(resp.read().decode())
-            if r.get("ok"):
-                print(f"[OK] Slack file uploaded: {Path(filepath).name}")
-            else:
-                print(f"[WARN] Slack upload failed: {r.get('error')}")
-        except Exception as e:
-            print(f"[WARN] Slack upload error: {e}")
+    def close(self):
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns = []
 
 
 # ============================================================================
@@ -1371,6 +3909,34 @@ def main():
     parser.add_argument("--date", help="Override date (YYYY-MM-DD) for testing")
     parser.add_argument("--send", action="store_true", help="Force send notification")
     parser.add_argument("--weekly", action="store_true", help="Generate weekly report")
+    parser.add_argument("--monthly", action="store_true",
+                        help="Generate monthly report (month of --date; previous month on the 1st)")
+    parser.add_argument("--quarterly", action="store_true",
+                        help="Generate quarterly report (quarter of --date; previous quarter on its first day)")
+    parser.add_argument("--full-verify", action="store_true",
+                        help="Re-hash every file instead of trusting unchanged size/mtime")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Process up to N projects concurrently")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Run projects on an asyncio event loop (one project's AI call "
+                             "overlaps others' scans and writes; notifications are sent together at the end)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Generate entries for several projects/dates per AI request "
+                             "(also enabled by general.batch.enabled)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call the AI backend (ignore cached entries)")
+    parser.add_argument("--export", metavar="FILE",
+                        help="Write the note entries of --from..--to to FILE (default: last 30 days)")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Find the note sections containing every word of QUERY (oldest first; "
+                             "narrow with --project, --from/--to, --section)")
+    parser.add_argument("--section", help="--search: only sections whose heading starts with this")
+    parser.add_argument("--limit", type=int, default=20, help="--search: max results (default: 20)")
+    parser.add_argument("--from", dest="date_from",
+                        help="Start date (YYYY-MM-DD) for --export, --search and reports (--weekly: default 7 days "
+                             "before --to; --monthly/--quarterly: report over --from..--to)")
+    parser.add_argument("--to", dest="date_to",
+                        help="End date (YYYY-MM-DD) for --export and reports (default: today)")
 
     args = parser.parse_args()
     config = load_config(args.config)
@@ -1388,7 +3954,8 @@ def main():
         pc = next((p for p in config.get("projects", []) if p["name"] == args.init), None)
         if not pc:
             print(f"[ERROR] Project '{args.init}' not found"); sys.exit(1)
-        gen = NoteGenerator(config)
+        gen = NoteGenerator(config, state_dir, use_cache=not args.no_cache, batch=args.batch or None,
+                            verbose=args.verbose)
         content = gen.generate_initial_note(pc)
         note_path = (config_dir / pc["note_output"]).resolve()
         if args.dry_run:
@@ -1397,25 +3964,103 @@ def main():
             NoteWriter.create_initial(note_path, content)
             print("")
             print("[INFO] Backfilling daily entries from git history...")
-            gen._backfill_history(pc, note_path)
+            store = StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+            NoteIndex(store).reset(pc["name"], note_path)
+            gen._backfill_history(pc, note_path, store)
+            store.close()
+        if args.verbose:
+            gen.print_stats()
+        return
+
+    # --search
+    if args.search:
+        search = SearchIndex.open(state_dir)
+        if not search:
+            sys.exit(1)
+        store = StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+        note_index = NoteIndex(store)
+        names = []
+        for pc in config.get("projects", []):
+            if args.project and pc["name"] != args.project:
+                continue
+            names.append(pc["name"])
+            daily_dir = (config_dir / pc.get("daily_dir", f"./{pc['name']}/daily")).resolve()
+            note_path = (config_dir / pc.get("note_output", "")).resolve()
+            changed = search.sync(pc["name"], note_index, note_path, daily_dir)
+            if changed:
+                print(f"[INFO] {pc['name']}: indexed {changed} changed document(s)")
+        store.close()
+        t0 = time.perf_counter()
+        total, hits = search.search(
+            args.search, names, datetime.date.fromisoformat(args.date_from) if args.date_from else None,
+            datetime.date.fromisoformat(args.date_to) if args.date_to else None, args.section, args.limit)
+        elapsed = (time.perf_counter() - t0) * 1000
+        search.close()
+        for hit in hits:
+            when = hit["date"] if hit["date"] != "note" else "(note)"
+            print(f"{when}  {hit['project']}  ## {hit['heading']}  {hit['path']}")
+            print(f"    {hit['snippet']}")
+        shown = f", showing {len(hits)}" if len(hits) < total else ""
+        print(f"[INFO] {total} match(es){shown} in {elapsed:.1f} ms")
+        return
+
+    # --export
+    if args.export:
+        end = datetime.date.fromisoformat(args.date_to) if args.date_to else get_date(config)
+        start = datetime.date.fromisoformat(args.date_from) if args.date_from else end - datetime.timedelta(days=29)
+        store = StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+        note_index = NoteIndex(store)
+        parts = []
+        for pc in config.get("projects", []):
+            if args.project and pc["name"] != args.project:
+                continue
+            note_path = (config_dir / pc.get("note_output", "")).resolve()
+            if not note_path.exists():
+                print(f"[WARN] Note not found: {note_path}")
+                continue
+            entries = note_index.entries(pc["name"], note_path, start, end)
+            parts.append(f"# {pc['name']} - Research Notes ({start} ~ {end})\n"
+                         f"> **Entries**: {len(entries)}\n"
+                         + "".join(f"\n---\n\n{text}\n" for _, text in entries))
+            print(f"[INFO] {pc['name']}: {len(entries)} entries")
+        store.close()
+        Path(args.export).write_text("\n\n".join(parts), encoding="utf-8")
+        print(f"[OK] Exported: {args.export}")
         return
 
-    # --weekly
-    if args.weekly:
-        merger = WeeklyMerger(config)
-        notifier = NotificationManager(config)
-        today = get_date(config)
+    # --weekly / --monthly / --quarterly
+    if args.weekly or args.monthly or args.quarterly:
+        store = StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+        merger = WeeklyMerger(config, state_dir, use_cache=not args.no_cache, store=store)
+        notifier = NotificationManager(config, state_dir, store)
+        today = datetime.date.fromisoformat(args.date_to) if args.date_to else get_date(config)
+        start = datetime.date.fromisoformat(args.date_from) if args.date_from else None
+        kind = "Quarterly" if args.quarterly else "Monthly" if args.monthly else "Weekly"
         for pc in config.get("projects", []):
             if args.project and pc["name"] != args.project:
                 continue
             daily_dir = (config_dir / pc.get("daily_dir", f"./{pc['name']}/daily")).resolve()
-            report_path = merger.merge(daily_dir, pc["name"], today)
+            if kind == "Weekly":
+                report_path = merger.merge(daily_dir, pc["name"], today, start)
+            elif start:
+                report_path = merger.merge_period(daily_dir, pc["name"], start, today, kind.lower())
+            elif kind == "Monthly":
+                report_path = merger.merge_monthly(daily_dir, pc["name"], today)
+            else:
+                report_path = merger.merge_quarterly(daily_dir, pc["name"], today)
             if report_path and (args.send or config.get("notification", {}).get("enabled")):
                 body = report_path.read_text(encoding="utf-8")
-                notifier.send(
-                    subject=f"[Weekly] {pc['name']} Research Report ({today.isoformat()})",
+                notifier.queue(
+                    subject=f"[{kind}] {pc['name']} Research Report ({today.isoformat()})",
                     body=body, attachment_path=report_path
                 )
+        store.close()
+        notifier.flush()
+        if args.verbose:
+            if merger.response_cache:
+                print(merger.response_cache.summary())
+            for line in merger.backend.summary():
+                print(line)
         return
 
     # Normal: detect → generate → write → notify
@@ -1425,12 +4070,27 @@ def main():
         if not projects:
             print(f"[ERROR] Project '{args.project}' not found"); sys.exit(1)
 
-    generator = NoteGenerator(config)
-    idle_detector = IdleDetector(config, state_dir)
-    notifier = NotificationManager(config)
+    scan_config = dict(config.get("scan", {}))
+    if args.full_verify:
+        scan_config["full_verify"] = True
+
+    store = StateStore.open(state_dir, config.get("state", {}).get("backend", "sqlite"))
+    generator = NoteGenerator(config, state_dir, use_cache=not args.no_cache, batch=args.batch or None,
+                              verbose=args.verbose, store=store)
+    idle_detector = IdleDetector(config, state_dir, store)
+    pending_state = {}  # project -> saves its scan/idle state after the entry is written
+    digests = DailyDigests(config, store, generator.backend, generator.response_cache)
+    note_index = NoteIndex(store)
+    search = None if args.dry_run else SearchIndex.open(state_dir)
+    notifier = NotificationManager(config, state_dir, store)
     today = get_date(config)
 
-    for pc in projects:
+    schedule = config.get("notification", {}).get("schedule", "daily")
+    notify_daily = args.send or (notifier.enabled and schedule == "daily")
+
+    def detect_project(pc: dict) -> Optional[dict]:
+        """Resolve paths, detect changes and apply idle rules. Returns the
+        changes to write up, or None when there is nothing to do."""
         print(f"\n{'='*60}")
         print(f"Processing: {pc['name']}")
         print(f"{'='*60}")
@@ -1440,63 +4100,209 @@ def main():
         if not project_path.is_absolute():
             pc["path"] = str((config_dir / project_path).resolve())
         if not Path(pc["path"]).exists():
-            print(f"[ERROR] Path not found: {pc['path']}"); continue
+            print(f"[ERROR] Path not found: {pc['path']}"); return None
 
         # Detect changes
-        detector = ChangeDetector(pc, state_dir)
+        detector = ChangeDetector(pc, state_dir, scan_config, store)
         changes = detector.detect()
         total = len(changes["modified"]) + len(changes["new"]) + len(changes["deleted"])
 
         if args.verbose:
             print(f"  Changes: {total} (New:{len(changes['new'])} "
                   f"Mod:{len(changes['modified'])} Del:{len(changes['deleted'])})")
+        if changes.get("scan_errors"):
+            print(f"  [WARN] {len(changes['scan_errors'])} file(s) could not be read")
+            if args.verbose:
+                for fp, err in list(changes["scan_errors"].items())[:10]:
+                    print(f"    {fp}: {err}")
 
         # Idle detection
         idle_result = idle_detector.check(pc["name"], total > 0)
+
+        def commit():
+            detector.commit()
+            idle_detector.save(pc["name"], idle_result)
+
+        if not idle_result["should_run"] or total == 0:
+            if not args.dry_run:
+                commit()
         if not idle_result["should_run"]:
             if idle_result["paused"] and idle_detector.notify_on_pause:
-                notifier.send(
+                notifier.queue(
                     subject=f"[Paused] {pc['name']} - {idle_result['idle_days']}일간 변경 없음",
                     body=f"프로젝트 '{pc['name']}'가 {idle_result['idle_days']}일간 "
                          f"변경이 없어 연구노트 자동 생성을 중단합니다.\n"
                          f"변경이 감지되면 자동으로 재개됩니다."
                 )
-            continue
+            return None
 
         if total == 0:
             print(f"[SKIP] No changes for {pc['name']}")
-            continue
-
-        # Generate entry
-        entry = generator.generate_daily_entry(changes)
+            return None
+        # Scan and idle state are saved only once the entry is written (write_project),
+        # so a failed generation leaves these changes for the next run
+        pending_state[pc["name"]] = commit
+        return changes
 
-        if args.dry_run:
-            print(f"\n[DRY-RUN] Would write:\n{'─'*40}\n{entry}\n{'─'*40}")
-            continue
+    def write_project(pc: dict, entry: str) -> Path:
+        """Write the entry's daily file (segment), then bring the full note up to
+        date with it; returns the daily file."""
+        # 1. Daily file = the day's segment (+ its digest for weekly/monthly reports)
+        daily_dir = (config_dir / pc.get("daily_dir", f"./{pc['name']}/daily")).resolve()
+        daily_path = DailyFileWriter.write(daily_dir, pc["name"], today, entry, note_index)
+        digests.update(pc["name"], today, daily_path, entry)
 
-        # 1. Ensure full note exists
+        # 2. Ensure full note exists
         note_path = (config_dir / pc.get("note_output", "")).resolve()
         if not note_path.exists():
             print(f"[INFO] Creating initial note...")
             NoteWriter.create_initial(note_path, generator.generate_initial_note(pc))
+            note_index.reset(pc["name"], note_path)
 
-        # 2. Append to full RESEARCH_NOTE.md (chronological - newest at bottom)
-        NoteWriter.append_entry(note_path, entry, date_override=today)
+        # 3. Append pending segments to RESEARCH_NOTE.md (chronological - newest at bottom)
+        note_index.materialize(pc["name"], note_path, date_override=today)
 
-        # 3. Write separate daily file
-        daily_dir = (config_dir / pc.get("daily_dir", f"./{pc['name']}/daily")).resolve()
-        daily_path = DailyFileWriter.write(daily_dir, pc["name"], today, entry)
-
-        # 4. Notify (if daily schedule)
-        schedule = config.get("notification", {}).get("schedule", "daily")
-        if args.send or (notifier.enabled and schedule == "daily"):
-            body = daily_path.read_text(encoding="utf-8")
-            notifier.send(
-                subject=f"[Daily] {pc['name']} Research Note ({today.isoformat()})",
-                body=body, attachment_path=daily_path
-            )
+        # 4. Search index: the new entry and (if edited) the note's top sections
+        if search:
+            search.add(pc["name"], today.isoformat(), daily_path, daily_path.read_text(encoding="utf-8"))
+            search.add_note_head(pc["name"], note_path)
+
+        # 5. The changes are written up: now save the scan/idle state
+        commit = pending_state.pop(pc["name"], None)
+        if commit:
+            commit()
+        return daily_path
+
+    def daily_notification(pc: dict, daily_path: Path) -> dict:
+        return {"subject": f"[Daily] {pc['name']} Research Note ({today.isoformat()})",
+                "body": daily_path.read_text(encoding="utf-8"), "attachment_path": daily_path}
+
+    def finish_project(pc: dict, entry: str):
+        if args.dry_run:
+            print(f"\n[DRY-RUN] Would write:\n{'─'*40}\n{entry}\n{'─'*40}")
+            return
+        daily_path = write_project(pc, entry)
+        # 6. Notify (if daily schedule; delivered together after all projects)
+        if notify_daily:
+            notifier.queue(**daily_notification(pc, daily_path))
+
+    def process_project(pc: dict):
+        changes = detect_project(pc)
+        if changes is None:
+            return
+        finish_project(pc, generator.generate_daily_entry(changes))
+
+    def run_batched() -> list:
+        """Batch mode: detect every project first, generate all entries with
+        packed requests, then write and notify per project."""
+        ok, detected = {}, []
+        for pc in projects:
+            ok[pc["name"]] = True
+            try:
+                changes = detect_project(pc)
+            except Exception as e:
+                print(f"[ERROR] {pc['name']} failed: {e}")
+                ok[pc["name"]] = False
+                continue
+            if changes is not None:
+                detected.append((pc, changes))
+        if detected:
+            print(f"\n[INFO] Generating {len(detected)} entries in batch mode")
+            day_name = NoteGenerator.DAY_NAMES[today.weekday()]
+            entries = generator.generate_batch([(changes, today, day_name) for _, changes in detected])
+            for (pc, _), entry in zip(detected, entries):
+                try:
+                    if isinstance(entry, Exception):
+                        raise entry
+                    finish_project(pc, entry)
+                except Exception as e:
+                    print(f"[ERROR] {pc['name']} failed: {e}")
+                    ok[pc["name"]] = False
+        return [ok[pc["name"]] for pc in projects]
+
+    async def aprocess_project(pc: dict):
+        # Blocking stages run in threads and the AI call is awaited, so one
+        # project's generation overlaps another's scan and write.
+        changes = await run_in_thread(detect_project, pc)
+        if changes is None:
+            return
+        entry = await generator.agenerate_daily_entry(changes)
+        if args.dry_run:
+            print(f"\n[DRY-RUN] Would write:\n{'─'*40}\n{entry}\n{'─'*40}")
+            return
+        daily_path = await run_in_thread(write_project, pc, entry)
+        if notify_daily:
+            notifier.queue(**daily_notification(pc, daily_path))
+
+    def run_project(pc: dict) -> bool:
+        """process_project with failures contained to this project."""
+        ProjectLog.set_project(pc["name"] if jobs > 1 else None)
+        try:
+            process_project(pc)
+            return True
+        except Exception as e:
+            print(f"[ERROR] {pc['name']} failed: {e}")
+            return False
+        finally:
+            ProjectLog.set_project(None)
+
+    async def arun_all() -> list:
+        import asyncio
+        limit = asyncio.Semaphore(jobs)
 
+        async def arun_project(pc: dict) -> bool:
+            async with limit:
+                ProjectLog.set_project(pc["name"] if jobs > 1 else None)
+                try:
+                    await aprocess_project(pc)
+                    return True
+                except Exception as e:
+                    print(f"[ERROR] {pc['name']} failed: {e}")
+                    return False
+
+        return await asyncio.gather(*(arun_project(pc) for pc in projects))
+
+    # --async defaults to all projects at once (AI calls stay bounded per backend)
+    batched = generator.batch and len(projects) > 1
+    jobs = args.jobs or (len(projects) if args.use_async else 1)
+    jobs = 1 if batched else max(1, min(jobs, len(projects)))
+    if jobs > 1:
+        mode = "async tasks" if args.use_async else "parallel jobs"
+        print(f"[INFO] Processing {len(projects)} projects with {jobs} {mode}")
+        sys.stdout = ProjectLog(sys.stdout)
+    try:
+        if batched:
+            results = run_batched()
+        elif args.use_async:
+            import asyncio
+            results = asyncio.run(arun_all())
+        elif jobs > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=jobs) as ex:
+                results = list(ex.map(run_project, projects))
+        else:
+            results = [run_project(pc) for pc in projects]
+    except KeyboardInterrupt:
+        print("\n[WARN] Interrupted - in-flight AI calls cancelled")
+        store.close()
+        if search:
+            search.close()
+        sys.exit(130)
+    finally:
+        if isinstance(sys.stdout, ProjectLog):
+            sys.stdout = sys.stdout.stream
+
+    store.close()
+    if search:
+        search.close()
+    notifier.flush()
+    if args.verbose:
+        generator.print_stats()
+    failed = [pc["name"] for pc, ok in zip(projects, results) if not ok]
     print(f"\nDone! ({datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
+    if failed:
+        print(f"[ERROR] Failed projects: {', '.join(failed)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
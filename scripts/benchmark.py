@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Research Note Generator - Benchmarks
+====================================
+Synthetic micro-benchmarks for the hot paths of generate_note.py.
+
+Usage:
+    python scripts/benchmark.py scan                      # 100k-file tree, workers 1..8
+    python scripts/benchmark.py scan --files 20000 --workers 1 2 4 8 16
+    python scripts/benchmark.py scan --latency-ms 2       # simulate NFS open latency
+    python scripts/benchmark.py match                     # PathMatcher vs fnmatch loops
+    python scripts/benchmark.py startup                   # import time + no-change run wall time
+    python scripts/benchmark.py startup --projects 10 --files 2000 --repeat 5
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import generate_note  # noqa: E402
+
+
+def make_tree(root: Path, n_files: int, per_dir: int = 200):
+    """Create n_files small python files spread over nested directories."""
+    for i in range(n_files):
+        d = root / f"pkg{i // (per_dir * 50)}" / f"mod{(i // per_dir) % 50}"
+        if i % per_dir == 0:
+            d.mkdir(parents=True, exist_ok=True)
+        (d / f"f{i}.py").write_text(f"# file {i}\n" + "x = 1\n" * (i % 40), encoding="utf-8")
+
+
+def simulate_latency(latency_ms: float):
+    """Add a fixed sleep before every file open (stand-in for NFS round trips)."""
+    delay = latency_ms / 1000.0
+    orig_hash = generate_note.FileHasher.hash
+    orig_count = generate_note.ChangeDetector._count_lines
+
+    def slow_hash(self, path, size=None):
+        time.sleep(delay)
+        return orig_hash(self, path, size)
+
+    def slow_count(rec):
+        time.sleep(delay)
+        return orig_count(rec)
+
+    generate_note.FileHasher.hash = slow_hash
+    generate_note.ChangeDetector._count_lines = staticmethod(slow_count)
+
+
+def bench_scan(args):
+    if args.latency_ms:
+        simulate_latency(args.latency_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "project"
+        state_dir = Path(tmp) / "state"
+        print(f"[BENCH] Creating {args.files} files under {root} ...")
+        make_tree(root, args.files)
+        pc = {"name": "bench", "path": str(root), "include_patterns": ["**/*.py"]}
+
+        t0 = time.perf_counter()
+        records = generate_note.ProjectWalker(pc).walk()
+        print(f"[BENCH] walk: {len(records)} files in {time.perf_counter() - t0:.2f}s")
+
+        print(f"{'workers':>8} {'hash (s)':>10} {'lines (s)':>10} {'speedup':>8}")
+        base = None
+        for w in args.workers:
+            det = generate_note.ChangeDetector(pc, state_dir / f"w{w}", {"workers": w})
+            t0 = time.perf_counter()
+            det._scan_files(records)
+            t_hash = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            det._get_file_stats(records)
+            t_lines = time.perf_counter() - t0
+            total = t_hash + t_lines
+            base = base or total
+            print(f"{w:>8} {t_hash:>10.2f} {t_lines:>10.2f} {base / total:>7.2f}x")
+
+
+def legacy_match(fp: str, include: list, exclude: list) -> bool:
+    """The per-pattern fnmatch loop PathMatcher replaced (kept for comparison)."""
+    if os.path.basename(fp) == "RESEARCH_NOTE.md":
+        return False
+    parts = fp.split("/")
+    if any(d in ("daily", "__pycache__") for d in parts[:-1]):
+        return False
+    for pattern in exclude:
+        if fnmatch.fnmatch(fp, pattern):
+            return False
+        if "**" in pattern:
+            simple = pattern.replace("**/", "").replace("/**", "").strip("/")
+            if simple in parts:
+                return False
+    for p in include:
+        if fnmatch.fnmatch(fp, p):
+            return True
+        if p.startswith("**/") and fnmatch.fnmatch(fp, p[3:]):
+            return True
+    return False
+
+
+def bench_match(args):
+    include = ["**/*.py", "**/*.sh", "**/*.yaml", "**/*.yml", "**/*.md", "**/*.ipynb"]
+    exclude = ["**/__pycache__/**", "**/.git/**", "**/*.pyc", "**/results/**",
+               "**/logs/**", "**/daily/**", "**/checkpoints/**", "**/wandb/**"]
+    exts = [".py", ".md", ".pt", ".yaml", ".pyc", ".txt", ".sh", ".npy"]
+    dirs = ["src", "src/models", "results/run1", "logs", "data/raw", "notebooks", "a/b/c/d"]
+    paths = [f"{dirs[i % len(dirs)]}/f{i}{exts[i % len(exts)]}" for i in range(args.paths)]
+    matcher = generate_note.PathMatcher(include, generate_note.ProjectWalker.AUTO_EXCLUDE + exclude)
+
+    t0 = time.perf_counter()
+    old = [legacy_match(p, include, exclude) for p in paths]
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = [matcher.match(p) for p in paths]
+    t_new = time.perf_counter() - t0
+
+    print(f"[BENCH] {len(paths)} paths x {len(include)} include / {len(exclude)} exclude patterns")
+    print(f"  fnmatch loop : {t_old:.3f}s")
+    print(f"  PathMatcher  : {t_new:.3f}s ({t_old / t_new:.1f}x)")
+    print(f"  agreement    : {sum(a == b for a, b in zip(old, new))}/{len(paths)}")
+
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def import_profile() -> tuple:
+    """(total_us, [(cumulative_us, module)]) for `import generate_note`, from
+    `python -X importtime`; the list holds generate_note's direct imports."""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", "import generate_note"],
+                       cwd=ROOT, capture_output=True, text=True, check=True)
+    children = []
+    for line in r.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        cumulative, depth, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if name == "generate_note":
+            return cumulative, [(c, n) for c, d, n in children if d == depth + 2]
+        if depth <= 1:
+            children = []  # an unrelated top-level import (site, ...) ended
+        else:
+            children.append((cumulative, depth, name))
+    raise RuntimeError("generate_note not found in -X importtime output")
+
+
+def bench_startup(args):
+    runs = [import_profile() for _ in range(args.repeat)]
+    total, modules = min(runs)
+    print(f"[BENCH] import generate_note: {total / 1000:.1f} ms (best of {args.repeat})")
+    for cumulative, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:>7.1f} ms  {name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        projects = []
+        for i in range(args.projects):
+            root = tmp / f"p{i}"
+            make_tree(root, args.files)
+            projects.append({"name": f"p{i}", "path": str(root), "include_patterns": ["**/*.py"],
+                             "note_output": str(root / "RESEARCH_NOTE.md"),
+                             "daily_dir": str(root / "daily")})
+        config = {"general": {"ai_backend": "auto"}, "state": {"state_dir": ".state"},
+                  "notification": {"enabled": False, "weekly": {"ai_summary": False}},
+                  "projects": projects}
+        config_path = tmp / "config.yaml"
+        config_path.write_text(json.dumps(config), encoding="utf-8")  # JSON is valid YAML
+
+        # Seed scan state so that the timed runs see no changes
+        state_dir = tmp / ".state"
+        store = generate_note.StateStore.open(state_dir)
+        for pc in projects:
+            detector = generate_note.ChangeDetector(pc, state_dir, {}, store)
+            detector.detect()
+            detector.commit()
+        store.close()
+
+        print(f"[BENCH] {args.projects} projects x {args.files} files, no changes")
+        for label, extra in (("daily --dry-run", ["--dry-run"]), ("--weekly (no AI summary)", ["--weekly"])):
+            times, probed = [], False
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                r = subprocess.run([sys.executable, str(ROOT / "generate_note.py"), "-c", str(config_path)]
+                                   + extra, capture_output=True, text=True)
+                times.append(time.perf_counter() - t0)
+                probed |= "detected ✓" in r.stdout or "AI 백엔드를 찾을 수 없습니다" in r.stdout
+                if r.returncode != 0:
+                    print(r.stdout[-2000:])
+                    raise SystemExit(f"[BENCH] {label} exited with {r.returncode}")
+            print(f"  {label:<26} min {min(times):.3f}s  median {statistics.median(times):.3f}s"
+                  f"  backend probed: {'yes' if probed else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generate_note.py benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("scan", help="Parallel hashing + line counting")
+    p.add_argument("--files", type=int, default=100000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--latency-ms", type=float, default=0.0,
+                   help="Simulated per-file open latency (NFS)")
+    p.set_defaults(func=bench_scan)
+
+    p = sub.add_parser("match", help="Compiled include/exclude matcher vs fnmatch loops")
+    p.add_argument("--paths", type=int, default=100000)
+    p.set_defaults(func=bench_match)
+
+    p = sub.add_parser("startup", help="Import time and wall time of a run with nothing to do")
+    p.add_argument("--projects", type=int, default=5)
+    p.add_argument("--files", type=int, default=1000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--top", type=int, default=10, help="Slowest direct imports to list")
+    p.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
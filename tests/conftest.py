@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# generate_note.py is a single script at the repo root, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generate_note  # noqa: E402
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def backend(request):
+    """state.backend value; tests using it run once per StateStore backend."""
+    return request.param
+
+
+@pytest.fixture
+def store(tmp_path, backend):
+    s = generate_note.StateStore.open(tmp_path / ".state", backend)
+    yield s
+    s.close()
@@ -0,0 +1,116 @@
+"""Local SMTP and Slack Web API stand-ins that count sessions, logins,
+connections and calls, so tests can assert how notifications are delivered."""
+
+import collections
+import http.server
+import json
+import socketserver
+import threading
+import time
+
+
+class FakeSMTP(socketserver.ThreadingTCPServer):
+    """SMTP stand-in (no TLS): accepts any AUTH and counts sessions,
+    logins and messages. Each reply is delayed by `latency` seconds."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def reply(self, line: str):
+        time.sleep(self.server.latency)
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.server.count("sessions")
+        self.reply("220 localhost fake SMTP")
+        for raw in self.rfile:
+            cmd = raw.decode("utf-8", "replace").strip()
+            verb = cmd.split(" ")[0].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n")
+                self.reply("250 8BITMIME")
+            elif verb == "AUTH":
+                if cmd.upper() == "AUTH LOGIN":  # username and password prompts
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.server.count("logins")
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                self.server.count("messages")
+                self.reply("250 OK queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:  # HELO, MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class FakeSlack(http.server.ThreadingHTTPServer):
+    """Slack Web API stand-in (HTTP/1.1 keep-alive) counting connections and
+    calls per method. Channels listed in `gone` answer chat.postMessage with
+    channel_not_found; users listed in `malformed` get a conversations.open
+    reply without a channel."""
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.counts = collections.Counter()
+        self.gone = set()
+        self.malformed = set()
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), FakeSlackHandler)
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+
+class FakeSlackHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        method = self.path.rsplit("/", 1)[-1]
+        self.server.count(method)
+        time.sleep(self.server.latency)
+        if method == "conversations.open" and payload.get("users") in self.server.malformed:
+            resp = {"ok": True}
+        elif method == "conversations.open":
+            resp = {"ok": True, "channel": {"id": "D" + payload.get("users", "")}}
+        elif method == "chat.postMessage" and payload.get("channel") in self.server.gone:
+            resp = {"ok": False, "error": "channel_not_found"}
+        else:
+            resp = {"ok": True}
+        body = json.dumps(resp).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,92 @@
+"""AIRouter: probes stay off the event loop; a half-open backend gets one trial call."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import generate_note
+from generate_note import AIGenerationError, AIRouter
+
+CONFIG = {"general": {"ai_backend": "ollama", "ai_fallback": []}}
+
+
+class StubBackend:
+    name, model = "ollama", "stub"
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def complete(self, prompt, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return "ok"
+
+    async def acomplete(self, prompt, **kwargs):
+        self.calls += 1
+        return "ok"
+
+
+@pytest.fixture
+def router(monkeypatch):
+    r = AIRouter(CONFIG)
+    stub = StubBackend()
+    monkeypatch.setattr(r, "_backend", lambda name: stub)
+    return r, stub
+
+
+def test_async_probe_runs_off_the_event_loop(router, monkeypatch):
+    r, stub = router
+    probed_on = []
+
+    def check_ollama():
+        probed_on.append(threading.get_ident())
+        return True
+
+    monkeypatch.setattr(generate_note.AIBackendDetector, "check_ollama", check_ollama)
+    monkeypatch.setattr(generate_note.AIBackendDetector, "install_ollama_model", lambda model: True)
+
+    async def main():
+        return threading.get_ident(), await r.acomplete("p")
+
+    loop_thread, text = asyncio.run(main())
+    assert text == "ok" and stub.calls == 1
+    assert probed_on and loop_thread not in probed_on
+
+
+def test_half_open_allows_a_single_trial_call(router):
+    r, stub = router
+    r._available["ollama"] = True
+    r.health["ollama"] = dict(r._entry("ollama"), consecutive_failures=2, trips=1,
+                              open_until=time.time() - 1)  # cooldown over: half-open
+
+    results = []
+
+    def call():
+        try:
+            results.append(r.complete("p"))
+        except AIGenerationError as e:
+            results.append(str(e))
+
+    first = threading.Thread(target=call)
+    first.start()
+    while stub.calls == 0:
+        time.sleep(0.01)
+    call()  # while the trial is in flight: no second call reaches the backend
+    stub.release.set()
+    first.join()
+
+    assert stub.calls == 1
+    assert sorted(results) == ["All AI backends failed: trial call in progress", "ok"]
+    assert r.health["ollama"]["open_until"] == 0  # trial succeeded: circuit closed
+    assert r.complete("p") == "ok" and stub.calls == 2
+
+
+def test_router_per_state_dir_and_config(tmp_path):
+    a = AIRouter.get(CONFIG, tmp_path / "a")
+    assert AIRouter.get(CONFIG, tmp_path / "a") is a
+    assert AIRouter.get(CONFIG, tmp_path / "b") is not a
+    other = {"general": {"ai_backend": "claude_cli", "ai_fallback": []}}
+    assert AIRouter.get(other, tmp_path / "a").order == ["claude_cli"]
@@ -0,0 +1,40 @@
+"""Message Batches API: a batch that outlives batch.max_wait_sec is cancelled."""
+
+import time
+from types import SimpleNamespace
+
+import generate_note
+
+
+class FakeBatches:
+    """messages.batches of a client whose batch never finishes."""
+
+    def __init__(self):
+        self.cancelled = []
+        self.polls = 0
+
+    def create(self, requests):
+        return SimpleNamespace(id="msgbatch_1", processing_status="in_progress")
+
+    def retrieve(self, batch_id):
+        self.polls += 1
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    def cancel(self, batch_id):
+        self.cancelled.append(batch_id)
+
+    def results(self, batch_id):
+        raise AssertionError("results of an unfinished batch")
+
+
+def test_batch_cancelled_after_max_wait():
+    backend = generate_note.AnthropicAPIBackend({})
+    batches = FakeBatches()
+    backend._client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+
+    t0 = time.perf_counter()
+    out = backend.complete_batch({"e0": "p0", "e1": "p1"}, poll_sec=30, max_wait=0.2)
+
+    assert out == {}  # nothing finished: the caller generates both individually
+    assert batches.cancelled == ["msgbatch_1"]
+    assert time.perf_counter() - t0 < 5  # the poll sleep does not overshoot the deadline
@@ -0,0 +1,57 @@
+"""Git-mode change detection: each run reports only what changed since the last committed scan."""
+
+import subprocess
+
+import pytest
+
+from generate_note import ChangeDetector
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    (repo / "a.py").write_text("a = 1\n")
+    (repo / "b.py").write_text("b = 1\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "initial")
+    return repo
+
+
+def detector(repo, store):
+    return ChangeDetector({"name": "p1", "path": str(repo), "detection": "git",
+                           "include_patterns": ["**/*.py"]}, store.state_dir, store=store)
+
+
+def test_git_scan_committed_between_runs(repo, store):
+    first = detector(repo, store).detect()
+    assert sorted(first["new"]) == ["a.py", "b.py"]
+    assert first["commits"] and first["commits"][0].endswith("initial")
+
+    # Not committed (entry never written): the next run reports the same changes
+    d = detector(repo, store)
+    assert sorted(d.detect()["new"]) == ["a.py", "b.py"]
+    d.commit()
+    assert store.load_doc("p1", "scan")["saved_at"]
+
+    (repo / "a.py").write_text("a = 2\n")
+    (repo / "c.py").write_text("c = 1\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "second")
+
+    d = detector(repo, store)
+    changes = d.detect()
+    assert changes["modified"] == ["a.py"]
+    assert changes["new"] == ["c.py"]
+    assert [c.split(" ", 1)[1] for c in changes["commits"]] == ["second"]
+    assert "a = 2" in changes["diffs"]["a.py"]
+    d.commit()
+
+    changes = detector(repo, store).detect()
+    assert changes["new"] == changes["modified"] == changes["commits"] == []
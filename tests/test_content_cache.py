@@ -0,0 +1,107 @@
+"""cached_completion / ContentCache against a stub backend: hit, miss, TTL expiry, LRU eviction."""
+
+import os
+import time
+
+import pytest
+
+import generate_note
+from generate_note import ContentCache, cached_completion
+
+
+class StubBackend:
+    """Stands in for an AI backend call; counts how often it is reached."""
+
+    def __init__(self, size: int = 100):
+        self.calls = []
+        self.size = size
+
+    def completion(self, prompt: str) -> str:
+        return cached_completion(self.cache, "stub", "stub-model", prompt, lambda: self._call(prompt))
+
+    def _call(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        return f"answer to {prompt} " + "x" * self.size
+
+
+@pytest.fixture
+def backend(tmp_path):
+    stub = StubBackend()
+    stub.cache = ContentCache(tmp_path, "responses", max_mb=1, ttl_days=30)
+    return stub
+
+
+def test_miss_calls_backend_and_hit_does_not(backend):
+    first = backend.completion("p1")
+    assert backend.calls == ["p1"]
+    assert backend.completion("p1") == first
+    assert backend.calls == ["p1"]
+    assert backend.cache.stats["hits"] == 1 and backend.cache.stats["misses"] == 1
+
+
+def test_hit_ignores_line_ending_and_trailing_whitespace(backend):
+    backend.completion("line one\nline two")
+    backend.completion("line one  \r\nline two\n")
+    assert len(backend.calls) == 1
+
+
+def test_different_prompt_is_a_miss(backend):
+    backend.completion("p1")
+    backend.completion("p2")
+    assert backend.calls == ["p1", "p2"]
+
+
+def test_ttl_expiry_forces_new_call(backend, monkeypatch):
+    backend.completion("p1")
+    later = time.time() + 31 * 86400
+    monkeypatch.setattr(generate_note.time, "time", lambda: later)
+    backend.completion("p1")
+    assert backend.calls == ["p1", "p1"]
+    assert backend.cache.stats["expired"] == 1
+
+
+def test_empty_response_is_not_cached(tmp_path):
+    cache = ContentCache(tmp_path, "responses")
+    calls = []
+
+    def call():
+        calls.append(1)
+        return "   "
+
+    cached_completion(cache, "stub", "m", "p", call)
+    cached_completion(cache, "stub", "m", "p", call)
+    assert len(calls) == 2
+
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    stub = StubBackend(size=1000)
+    stub.cache = ContentCache(tmp_path, "responses", max_mb=3000 / (1024 * 1024))
+    key = lambda p: generate_note._response_key("stub", "stub-model", p)  # noqa: E731
+
+    stub.completion("a")
+    stub.completion("b")
+    now = time.time()
+    os.utime(stub.cache._path(key("a")), (now - 300, now - 300))
+    os.utime(stub.cache._path(key("b")), (now - 200, now - 200))
+    stub.completion("a")  # hit: "a" becomes the most recently used
+    stub.completion("c")  # over the cap: the least recently used entry goes
+
+    assert stub.calls == ["a", "b", "c"]
+    assert not stub.cache._path(key("b")).exists()
+    assert stub.cache._path(key("a")).exists() and stub.cache._path(key("c")).exists()
+    assert stub.cache.stats["evicted"] == 1
+    assert sum(e["size"] for e in stub.cache._entries()) <= stub.cache.max_bytes
+
+    stub.completion("b")
+    assert stub.calls == ["a", "b", "c", "b"]
+
+
+def test_overwriting_a_key_does_not_grow_the_total(tmp_path):
+    cache = ContentCache(tmp_path, "responses", max_mb=5000 / (1024 * 1024))
+    cache.put("0" * 64, {"text": "x" * 1000})
+    for _ in range(10):
+        cache.put("1" * 64, {"text": "y" * 1000})  # same key rewritten: ~2 KB on disk throughout
+        assert cache._total == sum(e["size"] for e in cache._entries())
+
+    assert cache.stats["evicted"] == 0
+    assert cache.get("0" * 64) is not None
@@ -0,0 +1,38 @@
+"""NoteIndex spans and metadata, on every StateStore backend."""
+
+import datetime
+
+from generate_note import DailyFileWriter, NoteIndex, NoteWriter
+
+ENTRY = "# {d} (Mon)\n\n## Changes Summary\n- change {d}\n"
+
+
+def write_days(tmp_path, store, days):
+    index = NoteIndex(store)
+    note = tmp_path / "RESEARCH_NOTE.md"
+    if not note.exists():
+        NoteWriter.create_initial(note, "# p1\n\n## Daily Log\n")
+        index.reset("p1", note)
+    for day in days:
+        d = datetime.date(2026, 3, day)
+        DailyFileWriter.write(tmp_path / "daily", "p1", d, ENTRY.format(d=d), index)
+        index.materialize("p1", note, date_override=d)
+    return index, note
+
+
+def test_entries_read_by_span(tmp_path, store):
+    index, note = write_days(tmp_path, store, (2, 3))
+    index, note = write_days(tmp_path, store, (4,))  # a later run, same store
+
+    entries = index.entries("p1", note, datetime.date(2026, 3, 3), datetime.date(2026, 3, 4))
+    assert [d for d, _ in entries] == ["2026-03-03", "2026-03-04"]
+    assert "- change 2026-03-04" in entries[1][1]
+    assert all(isinstance(row, dict) for row in store.load_rows("p1", "note_index").values())
+
+
+def test_note_edited_behind_index_is_reindexed(tmp_path, store):
+    index, note = write_days(tmp_path, store, (2, 3))
+    note.write_text("# p1\n\nEdited intro.\n\n" + note.read_text(encoding="utf-8"), encoding="utf-8")
+
+    entries = index.entries("p1", note, datetime.date(2026, 3, 2), datetime.date(2026, 3, 2))
+    assert len(entries) == 1 and entries[0][1].startswith("# 2026-03-02")
@@ -0,0 +1,115 @@
+"""Batched notification delivery against local SMTP and Slack stand-ins."""
+
+import hashlib
+import threading
+
+import pytest
+
+import generate_note
+from fakes import FakeSlack, FakeSMTP
+from generate_note import StateStore
+
+TOKEN = "xoxb-test"
+
+
+@pytest.fixture
+def servers():
+    smtp, slack = FakeSMTP(), FakeSlack()
+    for server in (smtp, slack):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield smtp, slack
+    for server in (smtp, slack):
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def config(servers, monkeypatch):
+    smtp, slack = servers
+    monkeypatch.setenv("TEST_SMTP_SENDER", "notes@example.com")
+    monkeypatch.setenv("TEST_SMTP_PASSWORD", "secret")
+    monkeypatch.setenv("TEST_SLACK_TOKEN", TOKEN)
+    return {"notification": {
+        "enabled": True,
+        "email": {"enabled": True, "smtp_host": "127.0.0.1", "smtp_port": smtp.server_address[1],
+                  "use_tls": False, "sender_env": "TEST_SMTP_SENDER",
+                  "password_env": "TEST_SMTP_PASSWORD", "recipients": ["a@example.com", "b@example.com"]},
+        "slack": {"enabled": True, "bot_token_env": "TEST_SLACK_TOKEN",
+                  "api_url": f"http://127.0.0.1:{slack.server_address[1]}/api",
+                  "recipients": ["U0001"]},
+    }}
+
+
+def run(config, store, count=5, attachment=None):
+    notifier = generate_note.NotificationManager(config, store.state_dir, store)
+    for i in range(count):
+        notifier.queue(f"[Daily] p{i} Research Note", "- change\n", attachment)
+    notifier.flush()
+
+
+def test_one_smtp_session_and_login_per_run(config, servers, store):
+    smtp, _ = servers
+    run(config, store, count=5)
+    assert smtp.counts["sessions"] == 1
+    assert smtp.counts["logins"] == 1
+    assert smtp.counts["messages"] == 5
+
+
+def test_slack_reuses_one_connection(config, servers, store, tmp_path):
+    _, slack = servers
+    note = tmp_path / "2026-03-02-research-note.md"
+    note.write_text("# note\n", encoding="utf-8")
+    run(config, store, count=5, attachment=note)
+    assert slack.counts["chat.postMessage"] == 5
+    assert slack.counts["files.upload"] == 5
+    assert slack.counts["connections"] == 1
+
+
+def test_dm_channels_come_from_cache_on_next_run(config, servers, store):
+    _, slack = servers
+    run(config, store, count=3)
+    assert slack.counts["conversations.open"] == 1
+    assert store.load_doc(StateStore.SHARED, "slack_channels")["channels"] == {"U0001": "DU0001"}
+
+    slack.counts.clear()
+    run(config, store, count=3)
+    assert slack.counts["conversations.open"] == 0
+    assert slack.counts["chat.postMessage"] == 3
+
+
+def test_stale_cached_channel_is_reopened(config, servers, store):
+    _, slack = servers
+    token_id = hashlib.sha256(TOKEN.encode("utf-8")).hexdigest()[:16]
+    store.save_doc(StateStore.SHARED, "slack_channels", {"token": token_id, "channels": {"U0001": "DOLD"}})
+    slack.gone.add("DOLD")
+
+    run(config, store, count=2)
+    assert slack.counts["conversations.open"] == 1  # only the first send finds the channel gone
+    assert slack.counts["chat.postMessage"] == 3
+    assert store.load_doc(StateStore.SHARED, "slack_channels")["channels"] == {"U0001": "DU0001"}
+
+
+def test_recipients_share_a_bounded_connection_pool(config, servers, store):
+    _, slack = servers
+    config["notification"]["slack"]["recipients"] = [f"U{i:04d}" for i in range(8)]
+    run(config, store, count=4)
+    assert slack.counts["chat.postMessage"] == 4 * 8
+    assert slack.counts["conversations.open"] == 8
+    assert slack.counts["connections"] <= generate_note.NotificationManager.SLACK_WORKERS
+
+
+def test_nothing_sent_when_disabled(config, servers, store):
+    smtp, slack = servers
+    config["notification"]["enabled"] = False
+    run(config, store)
+    assert smtp.counts["sessions"] == 0
+    assert slack.counts["connections"] == 0
+
+
+def test_one_recipient_failing_does_not_drop_the_rest(config, servers, store):
+    smtp, slack = servers
+    config["notification"]["slack"]["recipients"] = ["UBAD", "U0001"]
+    slack.malformed.add("UBAD")  # KeyError on r["channel"]["id"]
+    run(config, store, count=3)
+    assert slack.counts["chat.postMessage"] == 3
+    assert smtp.counts["messages"] == 3
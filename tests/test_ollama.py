@@ -0,0 +1,52 @@
+"""OllamaBackend reconnects when a pooled keep-alive connection was closed by the server."""
+
+import http.server
+import json
+import threading
+
+import pytest
+
+from generate_note import OllamaBackend
+
+
+class DroppingHandler(http.server.BaseHTTPRequestHandler):
+    """Streams one /api/generate answer, then closes the connection without
+    saying so (as a server does when its keep-alive timeout expires)."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests += 1
+        body = b"".join(json.dumps(e).encode() + b"\n" for e in (
+            {"response": "hello", "done": False}, {"response": "", "done": True}))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), DroppingHandler)
+    server.daemon_threads = True
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    backend = OllamaBackend({})
+    backend.HOST, backend.PORT = server.server_address
+    yield backend, server
+    server.shutdown()
+    server.server_close()
+
+
+def test_stale_pooled_connection_is_retried(ollama):
+    backend, server = ollama
+    assert backend.complete("p1", timeout=10) == "hello"
+    assert len(backend._pool) == 1  # kept for reuse, but the server has closed it
+
+    assert backend.complete("p2", timeout=10) == "hello"
+    assert server.requests == 2
@@ -0,0 +1,70 @@
+"""End-to-end daily run with a stub `claude` CLI: state is only saved once the entry is written."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CLAUDE_STUB = """#!/usr/bin/env python3
+import os, sys
+if sys.argv[1] == "--version":
+    print("1.0"); sys.exit()
+if os.environ.get("CLAUDE_FAIL"):
+    sys.exit(3)
+print("# 2026-03-02 (Mon)\\n\\n## Changes Summary\\n- stub change\\n")
+"""
+
+
+@pytest.fixture
+def workspace(tmp_path, backend):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    claude = bin_dir / "claude"
+    claude.write_text(CLAUDE_STUB)
+    claude.chmod(0o755)
+    project = tmp_path / "p1"
+    project.mkdir()
+    (project / "train.py").write_text("lr = 0.1\n")
+    config = {
+        "general": {"ai_backend": "claude_cli", "ai_fallback": []},
+        "cache": {"enabled": False},
+        "state": {"state_dir": ".state", "backend": backend},
+        "notification": {"enabled": False},
+        "idle": {"enabled": True, "pause_after_days": 7},
+        "projects": [{"name": "p1", "path": "./p1", "detection": "mtime",
+                      "include_patterns": ["**/*.py"], "note_output": "./p1/RESEARCH_NOTE.md",
+                      "daily_dir": "./p1/daily"}],
+    }
+    (tmp_path / "config.yaml").write_text(json.dumps(config))  # JSON is valid YAML
+    return tmp_path
+
+
+def run(workspace: Path, fail: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PATH=f"{workspace / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    env.pop("ANTHROPIC_API_KEY", None)
+    if fail:
+        env["CLAUDE_FAIL"] = "1"
+    return subprocess.run([sys.executable, str(ROOT / "generate_note.py"), "-c",
+                           str(workspace / "config.yaml"), "--date", "2026-03-02"],
+                          cwd=workspace, env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_failed_generation_keeps_changes_for_next_run(workspace):
+    failed = run(workspace, fail=True)
+    assert failed.returncode == 1
+    assert "Failed projects: p1" in failed.stdout
+    assert not (workspace / "p1" / "daily").exists()
+
+    rerun = run(workspace)
+    assert rerun.returncode == 0, rerun.stdout + rerun.stderr
+    assert "No changes" not in rerun.stdout
+    assert (workspace / "p1" / "daily" / "2026-03-02-research-note.md").exists()
+
+    # Written up: the scan state is saved now, so nothing is reported twice
+    again = run(workspace)
+    assert "[SKIP] No changes for p1" in again.stdout
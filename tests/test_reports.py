@@ -0,0 +1,93 @@
+"""Monthly/quarterly/range reports: no AI call (or backend probe) unless report.ai_summary is on."""
+
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from generate_note import DailyDigests, DailyFileWriter, NoteIndex, WeeklyMerger
+
+ENTRY = "# {d} (Mon)\n\n## Changes Summary\n- change {d}\n\n## Lessons Learned\n- lesson {d}\n"
+
+
+@pytest.fixture
+def daily(tmp_path, store):
+    index = NoteIndex(store)
+    for day in (3, 4, 10):
+        d = datetime.date(2026, 3, day)
+        DailyFileWriter.write(tmp_path / "daily", "p1", d, ENTRY.format(d=d), index)
+    return tmp_path, store
+
+
+def merger(tmp_path, store, config, monkeypatch, summary=None):
+    m = WeeklyMerger(config, tmp_path / ".state", use_cache=False, store=store)
+    calls = []
+
+    def fake_summarize(instruction, content):
+        calls.append(instruction)
+        return summary
+
+    monkeypatch.setattr(m, "_summarize", fake_summarize)
+    return m, calls
+
+
+def test_monthly_without_ai_summary_never_touches_backend(daily, monkeypatch):
+    tmp_path, store = daily
+
+    def no_probe():
+        raise AssertionError("backend resolved although ai_summary is off")
+
+    m, calls = merger(tmp_path, store, {"notification": {"weekly": {"ai_summary": False}}}, monkeypatch)
+    monkeypatch.setattr(m.backend, "resolve", no_probe)
+
+    path = m.merge_monthly(tmp_path / "daily", "p1", datetime.date(2026, 3, 20))
+    text = path.read_text(encoding="utf-8")
+    assert path.name == "2026-03-monthly-report.md"
+    assert calls == []
+    assert "AI Generated" not in text
+    assert "- change 2026-03-10" in text  # digests are still listed
+
+    path = m.merge_quarterly(tmp_path / "daily", "p1", datetime.date(2026, 4, 1))
+    assert path.name == "2026-Q1-quarterly-report.md" and calls == []
+
+
+def test_report_ai_summary_overrides_weekly_flag(daily, monkeypatch):
+    tmp_path, store = daily
+    config = {"notification": {"weekly": {"ai_summary": False}}, "report": {"ai_summary": True}}
+    m, calls = merger(tmp_path, store, config, monkeypatch, summary="- month summary")
+    m.backend = SimpleNamespace(context_tokens=8000)  # no real backend behind the stubbed _summarize
+
+    path = m.merge_period(tmp_path / "daily", "p1", datetime.date(2026, 3, 1),
+                          datetime.date(2026, 3, 5), "monthly")
+    text = path.read_text(encoding="utf-8")
+    assert path.name == "2026-03-01_to_2026-03-05-monthly-report.md"
+    assert len(calls) == 1
+    assert "## Monthly Summary (AI Generated)" in text and "- month summary" in text
+    assert "2026-03-10" not in text
+
+
+class TimeoutRecorder:
+    """Backend stand-in that records the timeout of every call."""
+
+    def __init__(self):
+        self.timeouts = []
+
+    def complete(self, prompt, max_tokens=4096, timeout=None, cache=None):
+        self.timeouts.append(timeout)
+        return "- digest"
+
+
+def test_ai_digest_uses_general_ai_timeout(store):
+    backend = TimeoutRecorder()
+    config = {"general": {"ai_timeout_sec": 42}, "report": {"digest": "ai"}}
+    digests = DailyDigests(config, store, backend)
+    assert digests.update("p1", datetime.date(2026, 3, 2), None, ENTRY.format(d="2026-03-02")) == "- digest"
+    assert backend.timeouts == [42]
+
+
+def test_report_summary_uses_general_ai_timeout(daily):
+    tmp_path, store = daily
+    m = WeeklyMerger({"general": {"ai_timeout_sec": 42}}, tmp_path / ".state", use_cache=False, store=store)
+    m.backend = TimeoutRecorder()
+    assert m._summarize("Summarize", "- change") == "- digest"
+    assert m.backend.timeouts == [42]
@@ -0,0 +1,31 @@
+"""Shared (not per-project) docs: AI backend health and Slack DM channels."""
+
+import json
+
+from generate_note import AIRouter, StateStore
+
+CONFIG = {"general": {"ai_backend": "ollama", "ai_fallback": []}}
+
+
+def test_router_health_persists_in_store(store):
+    AIRouter(CONFIG, store=store)._record("ollama", "boom")
+
+    health = AIRouter(CONFIG, store=store).health
+    assert health["ollama"]["calls"] == 1
+    assert health["ollama"]["last_error"] == "boom"
+    assert store.load_doc(StateStore.SHARED, "ai_health") == health
+
+
+def test_legacy_shared_files_migrate(tmp_path, backend):
+    state_dir = tmp_path / ".state"
+    state_dir.mkdir()
+    legacy = {"ollama": {"calls": 3}}
+    (state_dir / "ai_health.json").write_text(json.dumps(legacy))
+
+    store = StateStore.open(state_dir, backend)
+    try:
+        assert store.load_doc(StateStore.SHARED, "ai_health") == legacy
+        store.save_doc("p1", "idle", {"last_activity": "2026-03-02"})
+        assert store.load_doc(StateStore.SHARED, "idle") is None  # projects stay separate
+    finally:
+        store.close()
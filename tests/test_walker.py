@@ -0,0 +1,20 @@
+"""ProjectWalker: symlinked directories are followed, link cycles terminate."""
+
+import os
+
+import generate_note
+
+
+def test_follows_symlinked_dirs_without_looping(tmp_path):
+    project, data = tmp_path / "project", tmp_path / "data"
+    (project / "src").mkdir(parents=True)
+    (data / "sub").mkdir(parents=True)
+    (project / "src" / "b.py").write_text("b = 1\n")
+    (data / "sub" / "a.py").write_text("a = 1\n")
+    os.symlink(data, project / "data")
+    os.symlink("..", project / "src" / "loop")  # cycle back to the project root
+
+    records = generate_note.ProjectWalker(
+        {"path": str(project), "include_patterns": ["**/*.py"]}).walk()
+
+    assert [r["path"] for r in records] == ["data/sub/a.py", "src/b.py"]